@@ -0,0 +1,145 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: In-process throughput benchmark for the asyncio graph facade
+#
+# Run from the repository root:
+#   python -m benchmarks.async_benchmark --vertices 2000 --clients 64 --queries 20
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from benchmarks.generators import GENERATORS, weighted
+from d_graph import DirectedGraph
+from graph_async import AsyncGraph
+
+
+def build_graph(generator, n, seed):
+    """
+    Build a sparse DirectedGraph from one of the seeded generators.
+    """
+
+    pairs = GENERATORS[generator](n, seed=seed)
+    vertices = max((max(u, v) for u, v in pairs), default=n - 1) + 1
+
+    graph = DirectedGraph(storage='sparse')
+    graph.add_vertices(vertices)
+    graph.add_edges_from(weighted(pairs, seed=seed))
+    return graph
+
+
+def make_requests(vertices, clients, queries, hot, write_ratio, seed):
+    """
+    Return one list of requests per client. Sources are drawn from hot popular vertices, as in a service where a few
+    entities are asked about most often; targets are uniform. A write_ratio share of the requests are add_edge calls.
+    """
+
+    rng = random.Random(seed)
+    popular = [rng.randrange(vertices) for _ in range(hot)]
+    requests = []
+
+    for _ in range(clients):
+        mine = []
+        for _ in range(queries):
+            if rng.random() < write_ratio:
+                mine.append(('add_edge', rng.randrange(vertices), rng.randrange(vertices), rng.randint(1, 9)))
+            elif rng.random() < 0.5:
+                mine.append(('distance', rng.choice(popular), rng.randrange(vertices)))
+            else:
+                mine.append(('bfs', rng.choice(popular), rng.randrange(vertices)))
+        requests.append(mine)
+
+    return requests
+
+
+def run_direct(graph, requests):
+    """
+    Answer every request one at a time with plain blocking calls, the way a handler without the facade would.
+    """
+
+    start = time.perf_counter()
+
+    for mine in requests:
+        for kind, *args in mine:
+            if kind == 'add_edge':
+                graph.add_edge(*args)
+            elif kind == 'distance':
+                graph.dijkstra(args[0], args[1])
+            else:
+                graph.bfs(*args)
+
+    return time.perf_counter() - start
+
+
+async def _client(facade, mine):
+    for kind, *args in mine:
+        if kind == 'add_edge':
+            await facade.add_edge(*args)
+        elif kind == 'distance':
+            await facade.distance(*args)
+        else:
+            await facade.bfs(*args)
+
+
+async def _ticker(lags, stop):
+    """
+    Measure how late the event loop wakes a task that sleeps 1 ms at a time, i.e. how long it is blocked.
+    """
+
+    while not stop.is_set():
+        before = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - before - 0.001)
+
+
+async def run_facade(graph, requests, concurrency, max_pending):
+    """
+    Run every client concurrently through one AsyncGraph. Returns (seconds, facade stats, worst event loop lag).
+    """
+
+    lags = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(lags, stop))
+
+    async with AsyncGraph(graph, max_pending=max_pending, concurrency=concurrency) as facade:
+        start = time.perf_counter()
+        await asyncio.gather(*(_client(facade, mine) for mine in requests))
+        seconds = time.perf_counter() - start
+
+    stop.set()
+    await ticker
+
+    return seconds, facade.stats(), max(lags, default=0.0)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure query throughput through the asyncio facade.')
+    parser.add_argument('--generator', default='power_law', choices=sorted(GENERATORS))
+    parser.add_argument('--vertices', type=int, default=2000)
+    parser.add_argument('--clients', type=int, default=64)
+    parser.add_argument('--queries', type=int, default=20, help='requests per client')
+    parser.add_argument('--hot', type=int, default=32, help='number of popular source vertices')
+    parser.add_argument('--write-ratio', type=float, default=0.01)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--max-pending', type=int, default=256)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    graph = build_graph(args.generator, args.vertices, args.seed)
+    requests = make_requests(graph.v_count, args.clients, args.queries, args.hot, args.write_ratio, args.seed)
+    total = args.clients * args.queries
+
+    direct = run_direct(build_graph(args.generator, args.vertices, args.seed), requests)
+    seconds, stats, lag = asyncio.run(run_facade(graph, requests, args.concurrency, args.max_pending))
+
+    print(json.dumps({
+        'requests': total,
+        'direct': {'seconds': direct, 'per_second': total / direct},
+        'facade': {'seconds': seconds, 'per_second': total / seconds, 'max_loop_lag': lag, **stats},
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Seeded synthetic graph generators for the benchmark suite
+
+import math
+import random
+
+# every generator returns a list of (u, v) pairs over the vertices 0 .. n - 1, without loops
+
+
+def erdos_renyi(n: int, avg_degree: float = 4, seed: int = 0) -> []:
+    """
+    Return about n * avg_degree distinct random directed pairs (G(n, m) model).
+    """
+
+    rng = random.Random(seed)
+    target = min(int(n * avg_degree), n * (n - 1))
+    pairs = set()
+
+    while len(pairs) < target:
+        u = rng.randrange(n)
+        v = rng.randrange(n)
+        if u != v:
+            pairs.add((u, v))
+
+    return sorted(pairs)
+
+
+def grid(n: int, seed: int = 0) -> []:
+    """
+    Return the right and down edges of a square grid with about n vertices, row-major numbered.
+    """
+
+    side = max(1, math.isqrt(n))
+    pairs = []
+
+    for row in range(side):
+        for col in range(side):
+            v = row * side + col
+            if col + 1 < side:
+                pairs.append((v, v + 1))
+            if row + 1 < side:
+                pairs.append((v, v + side))
+
+    return pairs
+
+
+def power_law(n: int, edges_per_vertex: int = 3, seed: int = 0) -> []:
+    """
+    Return a preferential attachment (Barabasi-Albert) graph: every new vertex links to edges_per_vertex existing
+    vertices picked proportionally to their degree, giving a power-law degree distribution with a few large hubs.
+    """
+
+    rng = random.Random(seed)
+    pairs = []
+    endpoints = list(range(min(n, edges_per_vertex + 1)))
+
+    for v in range(len(endpoints), n):
+
+        targets = set()
+        while len(targets) < min(edges_per_vertex, v):
+            targets.add(rng.choice(endpoints))
+
+        for u in targets:
+            pairs.append((v, u))
+            endpoints.append(u)
+        endpoints.extend([v] * len(targets))
+
+    return pairs
+
+
+def dag(n: int, avg_degree: float = 4, seed: int = 0) -> []:
+    """
+    Return random edges that always go from a lower to a higher vertex, so the graph is acyclic.
+    """
+
+    return sorted({(min(u, v), max(u, v)) for u, v in erdos_renyi(n, avg_degree, seed)})
+
+
+def chain(n: int, seed: int = 0) -> []:
+    """
+    Return the path 0 -> 1 -> ... -> n - 1, the worst case for recursion depth and search length.
+    """
+
+    return [(v, v + 1) for v in range(n - 1)]
+
+
+def weighted(pairs: [], max_weight: int = 20, seed: int = 0) -> []:
+    """
+    Attach a random weight in 1 .. max_weight to every pair.
+    """
+
+    rng = random.Random(seed)
+    return [(u, v, rng.randint(1, max_weight)) for u, v in pairs]
+
+
+def named(pairs: []) -> []:
+    """
+    Turn integer pairs into string vertex names for UndirectedGraph.
+    """
+
+    return [(f'v{u}', f'v{v}') for u, v in pairs]
+
+
+GENERATORS = {
+    'erdos_renyi': erdos_renyi,
+    'grid': grid,
+    'power_law': power_law,
+    'dag': dag,
+    'chain': chain,
+}
@@ -0,0 +1,226 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Benchmark runner for DirectedGraph and UndirectedGraph
+#
+# Run from the repository root:
+#   python -m benchmarks.run_benchmarks --sizes 100 1000 --output bench.json
+#   python -m benchmarks.run_benchmarks --compare old.json new.json
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+from benchmarks.generators import GENERATORS, named, weighted
+from d_graph import DirectedGraph
+from ud_graph import UndirectedGraph
+
+DEFAULT_SIZES = [100, 500, 2000]
+
+
+def _timed(timings, name, action):
+    """
+    Run action(), store its wall time under name and return its result.
+    """
+
+    start = time.perf_counter()
+    result = action()
+    timings[name] = time.perf_counter() - start
+    return result
+
+
+def directed_workload(edges, n, storage, timings):
+    """
+    Build a DirectedGraph vertex by vertex and edge by edge, run every query method once from vertex 0, then remove
+    every tenth vertex and compact the rest.
+    """
+
+    graph = DirectedGraph(storage=storage)
+
+    def add_vertices():
+        for _ in range(n):
+            graph.add_vertex()
+
+    def add_edges():
+        for src, dst, weight in edges:
+            graph.add_edge(src, dst, weight)
+
+    _timed(timings, 'add_vertex', add_vertices)
+    _timed(timings, 'add_edge', add_edges)
+    _timed(timings, 'get_edges', graph.get_edges)
+    _timed(timings, 'dfs', lambda: graph.dfs(0))
+    _timed(timings, 'bfs', lambda: graph.bfs(0))
+    _timed(timings, 'has_cycle', graph.has_cycle)
+    _timed(timings, 'dijkstra', lambda: graph.dijkstra(0))
+    _timed(timings, 'strongly_connected_components', graph.strongly_connected_components)
+
+    _timed(timings, 'remove_vertex', lambda: [graph.remove_vertex(v) for v in range(0, n, 10)])
+    _timed(timings, 'compact', graph.compact)
+
+
+def undirected_workload(edges, n, timings):
+    """
+    Build an UndirectedGraph vertex by vertex and edge by edge, run every query method once, then remove every tenth
+    vertex.
+    """
+
+    graph = UndirectedGraph()
+    names = [f'v{v}' for v in range(n)]
+
+    def add_vertices():
+        for name in names:
+            graph.add_vertex(name)
+
+    def add_edges():
+        for u, v in edges:
+            graph.add_edge(u, v)
+
+    _timed(timings, 'add_vertex', add_vertices)
+    _timed(timings, 'add_edge', add_edges)
+    _timed(timings, 'get_edges', graph.get_edges)
+    _timed(timings, 'dfs', lambda: graph.dfs(names[0]))
+    _timed(timings, 'bfs', lambda: graph.bfs(names[0]))
+    _timed(timings, 'has_cycle', graph.has_cycle)
+    _timed(timings, 'count_connected_components', graph.count_connected_components)
+    _timed(timings, 'remove_vertex', lambda: [graph.remove_vertex(name) for name in names[::10]])
+
+
+def run_case(kind, generator, n, seed, storage=None, repeat=3):
+    """
+    Run one workload repeat times for timings, keeping the best time of every method, then once more under
+    tracemalloc for the peak memory (kept separate because tracing slows everything down). Returns the result record.
+    """
+
+    pairs = GENERATORS[generator](n, seed=seed)
+    vertices = max((max(u, v) for u, v in pairs), default=n - 1) + 1
+
+    if kind == 'directed':
+        edges = weighted(pairs, seed=seed)
+
+        def workload(timings):
+            directed_workload(edges, vertices, storage, timings)
+    else:
+        edges = named(pairs)
+
+        def workload(timings):
+            undirected_workload(edges, vertices, timings)
+
+    timings = dict()
+    for _ in range(repeat):
+        attempt = dict()
+        workload(attempt)
+        for method, seconds in attempt.items():
+            timings[method] = min(seconds, timings.get(method, seconds))
+
+    tracemalloc.start()
+    workload(dict())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'graph': kind,
+        'storage': storage,
+        'generator': generator,
+        'vertices': vertices,
+        'edges': len(edges),
+        'seed': seed,
+        'repeat': repeat,
+        'timings': timings,
+        'peak_bytes': peak,
+    }
+
+
+def run_suite(sizes, generators, seed, storages, repeat=3):
+    """
+    Run every (graph kind, storage, generator, size) combination and return the JSON-ready report.
+    """
+
+    results = []
+
+    for n in sizes:
+        for generator in generators:
+            for storage in storages:
+                results.append(run_case('directed', generator, n, seed, storage, repeat))
+            results.append(run_case('undirected', generator, n, seed, repeat=repeat))
+
+    return {
+        'meta': {
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def _case_key(record):
+    return record['graph'], record['storage'], record['generator'], record['vertices']
+
+
+def compare(old, new, threshold, min_seconds=0.001):
+    """
+    Print the new/old time ratio of every method present in both reports and return the list of (case, method,
+    ratio) entries that got slower than threshold. Methods that took under min_seconds in both runs are skipped as
+    too noisy to compare.
+    """
+
+    baseline = {_case_key(record): record for record in old['results']}
+    regressions = []
+
+    for record in new['results']:
+
+        previous = baseline.get(_case_key(record))
+        if previous is None:
+            continue
+
+        for method, seconds in record['timings'].items():
+
+            before = previous['timings'].get(method)
+            if not before or max(before, seconds) < min_seconds:
+                continue
+
+            ratio = seconds / before
+            print(f'{"/".join(str(part) for part in _case_key(record)):<40} {method:<28} {ratio:6.2f}x')
+            if ratio > threshold:
+                regressions.append((_case_key(record), method, ratio))
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the graph classes on synthetic graphs.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--generators', nargs='+', default=sorted(GENERATORS), choices=sorted(GENERATORS))
+    parser.add_argument('--storage', nargs='+', default=['dense', 'sparse'])
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3, help='runs per case, the best time is kept')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='compare two JSON reports')
+    parser.add_argument('--threshold', type=float, default=1.25, help='slowdown ratio reported as a regression')
+    parser.add_argument('--min-seconds', type=float, default=0.001, help='ignore methods faster than this')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as oldFile, open(args.compare[1]) as newFile:
+            regressions = compare(json.load(oldFile), json.load(newFile), args.threshold, args.min_seconds)
+        for case, method, ratio in regressions:
+            print(f'REGRESSION {"/".join(str(part) for part in case)} {method} {ratio:.2f}x')
+        return 1 if regressions else 0
+
+    report = run_suite(args.sizes, args.generators, args.seed, args.storage, args.repeat)
+
+    if args.output:
+        with open(args.output, 'w') as outFile:
+            json.dump(report, outFile, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
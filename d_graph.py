@@ -5,6 +5,51 @@
 from collections import deque
 import heapq
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, all_pairs_shortest_paths() falls back to repeated dijkstra
+    np = None
+
+from d_storage import CSRAdjacency, DenseMatrix, SparseAdjacency, make_storage
+from graph_alt import LandmarkIndex
+from graph_batch import DeltaLog, DirectedBatch
+from graph_cache import QueryCache, cached_query
+from graph_io import read_directed_snapshot, read_weighted_edges, write_directed_snapshot
+from graph_parallel import bfs_many, dijkstra_many
+from graph_reach import ReachabilityIndex
+from graph_scc import Condensation
+from graph_stats import Instrumentation
+
+
+def _bit_positions(bits: int) -> []:
+    """
+    Return the positions of the set bits of a non-negative integer in ascending order.
+    """
+
+    digits = bin(bits)[:1:-1]
+    positions = []
+
+    i = digits.find('1')
+    while i != -1:
+        positions.append(i)
+        i = digits.find('1', i + 1)
+
+    return positions
+
+
+def _lane_members(vertices, bits, lanes: int) -> []:
+    """
+    Return, for every lane below lanes, the vertices (ascending) whose row of 64-bit lane words in bits has that lane's
+    bit set. vertices is an ascending NumPy array with one entry per row of bits.
+    """
+
+    flags = np.unpackbits(bits.astype('<u8').view(np.uint8), axis=1, bitorder='little')[:, :lanes]
+    lane, row = np.nonzero(flags.T)
+    members = vertices[row].tolist()
+    ends = np.cumsum(np.bincount(lane, minlength=lanes)).tolist()
+
+    return [members[start:end] for start, end in zip([0] + ends, ends)]
+
 
 class DirectedGraph:
     """
@@ -13,16 +58,31 @@ class DirectedGraph:
     - loops not allowed
     - only positive edge weights
     - vertex names are integers
+    - storage='dense' (adjacency matrix) or storage='sparse' (per-vertex neighbor maps)
     """
 
-    def __init__(self, start_edges=None):
+    def __init__(self, start_edges=None, storage=None):
         """
         Store graph info as adjacency matrix
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        The matrix lives in a storage engine picked by name ('dense' or 'sparse') or passed in directly
         """
-        self.flag = [0]
         self.v_count = 0
-        self.adj_matrix = []
+        self.adj_matrix = make_storage(storage)
+        self.version = 0
+        self._cache = None
+        self._row_bits = None
+        self._row_bits_version = -1
+        self._lane_edges = None
+        self._lane_edges_version = -1
+        self._instrumentation = None
+        self._condensation = None
+        self._reach_index = None
+        self._landmarks = None
+        self._frozen = None
+        self._delta_log = None
+        self._free = []
+        self._tombstones = set()
+        self.new_vertex_id = None
 
         # populate graph with initial vertices and edges (if provided)
         # before using, implement add_vertex() and add_edge() methods
@@ -30,10 +90,8 @@ class DirectedGraph:
             v_count = 0
             for u, v, _ in start_edges:
                 v_count = max(v_count, u, v)
-            for _ in range(v_count + 1):
-                self.add_vertex()
-            for u, v, weight in start_edges:
-                self.add_edge(u, v, weight)
+            self.add_vertices(v_count + 1)
+            self.add_edges_from(start_edges)
 
     def __str__(self):
         """
@@ -56,22 +114,26 @@ class DirectedGraph:
 
     def add_vertex(self) -> int:
         """
-        This method updates the previous vertex adjacency matrix to account for the new vertex, then adds a subarray
-        for the new vertex.
+        This method brings back the most recently removed vertex ID if there is one (its row and column are already
+        zero), otherwise it asks the storage engine for a new row and column of zeros. The engine grows its capacity
+        geometrically, so this is amortized O(1). Returns the number of vertices in the graph; the ID the new vertex got
+        is left in new_vertex_id, since with reuse it is no longer always the count minus one.
         """
 
-        holder = []
-
-        for i in range(len(self.adj_matrix)):
-            self.adj_matrix[i].append(0)
+        if len(self._free) > 0:
+            self.new_vertex_id = self._free.pop()
+            self._tombstones.discard(self.new_vertex_id)
+        else:
+            self.adj_matrix.add_vertex()
+            self.new_vertex_id = self.v_count
+            self.v_count += 1
 
-        for i in range(len(self.adj_matrix) + 1):
-            holder.append(0)
+        self.version += 1
 
-        self.adj_matrix.append(holder)
-        self.v_count += 1
+        if self._delta_log is not None:
+            self._delta_log.append([('add_vertex',)])
 
-        return self.v_count
+        return self.v_count - len(self._tombstones)
 
     def add_edge(self, src: int, dst: int, weight=1) -> None:
         """
@@ -80,8 +142,113 @@ class DirectedGraph:
 
         if src < 0 or src >= self.v_count or dst < 0 or dst >= self.v_count or weight < 0 or src == dst:
             return
+        if src in self._tombstones or dst in self._tombstones:
+            return
+
+        self.adj_matrix.set(src, dst, weight)
+        self.version += 1
+
+        if self._delta_log is not None:
+            self._delta_log.append([('add_edge', src, dst, weight)])
+        if self._reach_index is not None and weight:
+            self._reach_index.edge_added(src, dst, self.version - 1, self.version)
+
+    def add_vertices(self, n: int) -> int:
+        """
+        This method adds n vertices at the end in one step, letting the storage engine allocate for all of them at once
+        (removed IDs are not reused). Returns the new number of vertices.
+        """
 
-        self.adj_matrix[src][dst] = weight
+        self.adj_matrix.add_vertices(n)
+        self.v_count += n
+        self.version += 1
+
+        if self._delta_log is not None:
+            self._delta_log.append([('add_vertices', n)])
+
+        return self.v_count
+
+    def add_edges_from(self, edges) -> int:
+        """
+        This method adds (src, dst, weight) edges in bulk. Edges are filtered with the same rules as add_edge() (both
+        vertices must exist, no loops, no negative weights) and the rest are written by the storage engine in one
+        pass, so a repeated edge keeps its last weight. Returns the number of edges written.
+        """
+
+        n = self.v_count
+        valid = [(src, dst, weight) for src, dst, weight in edges
+                 if 0 <= src < n and 0 <= dst < n and weight >= 0 and src != dst]
+        if len(self._tombstones) > 0:
+            valid = [edge for edge in valid if edge[0] not in self._tombstones and edge[1] not in self._tombstones]
+
+        self.adj_matrix.set_many(valid)
+        self.version += 1
+
+        if self._delta_log is not None:
+            self._delta_log.append([('add_edge', src, dst, weight) for src, dst, weight in valid])
+
+        return len(valid)
+
+    @classmethod
+    def from_edge_list(cls, path, delimiter=None, header=False, storage=None, chunk_lines=100000):
+        """
+        This method builds a graph from a 'src dst [weight]' edge list file (comma separated for .csv, whitespace
+        otherwise). The file is streamed in chunks, vertices are added in bulk as higher IDs appear, and each chunk
+        goes through add_edges_from(), so loops and negative weights are skipped just like in add_edge().
+        """
+
+        graph = cls(storage=storage)
+
+        for chunk in read_weighted_edges(path, delimiter, header, chunk_lines):
+
+            highest = -1
+            for src, dst, _ in chunk:
+                if src > highest:
+                    highest = src
+                if dst > highest:
+                    highest = dst
+
+            if highest >= graph.v_count:
+                graph.add_vertices(highest + 1 - graph.v_count)
+
+            graph.add_edges_from(chunk)
+
+        return graph
+
+    def save(self, path) -> None:
+        """
+        This method writes the graph to a versioned binary snapshot: the weight matrix for dense storage, CSR arrays
+        for any other engine. Removed vertices come back as isolated vertices, call compact() first to drop them.
+        """
+
+        write_directed_snapshot(path, self.adj_matrix)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        This method opens a snapshot written by save(). With mmap=True the file is memory-mapped copy-on-write and the
+        storage engine reads straight from the mapped pages, so loading is near-instant and processes loading the
+        same file share the page cache. Changing the graph copies only what is needed.
+        """
+
+        storage = read_directed_snapshot(path, mmap)
+        graph = cls(storage=storage)
+        graph.v_count = len(storage)
+
+        return graph
+
+    def freeze(self):
+        """
+        This method returns a read-only FrozenDirectedGraph holding a compact CSR copy of the graph, with every
+        neighbor list already in ascending order. It supports all the query methods, and since it shares nothing with
+        this graph, readers of a snapshot are never affected by later writes here. The snapshot is kept until the
+        graph changes, so freezing an unchanged graph again is O(1) and returns the same object.
+        """
+
+        if self._frozen is None or self._frozen.version != self.version:
+            self._frozen = FrozenDirectedGraph.from_graph(self)
+
+        return self._frozen
 
     def remove_edge(self, src: int, dst: int) -> None:
         """
@@ -91,32 +258,218 @@ class DirectedGraph:
         if src < 0 or src >= self.v_count or dst < 0 or dst >= self.v_count:
             return
 
-        self.adj_matrix[src][dst] = 0
+        self.adj_matrix.set(src, dst, 0)
+        self.version += 1
 
-    def get_vertices(self) -> []:
+        if self._delta_log is not None:
+            self._delta_log.append([('remove_edge', src, dst)])
+
+    def remove_vertex(self, v: int) -> None:
         """
-        This method returns an array filled with integers corresponding to the vertices present.
+        This method tombstones v: every edge leaving or entering it is cleared, which is O(V) (one row and one column),
+        and its ID goes on a free list for add_vertex() to reuse, so the storage never has to move. Removed vertices
+        are left out of get_vertices() and cannot get edges or start a search; compact() renumbers the rest.
         """
-        output = []
 
-        for i in range(len(self.adj_matrix)):
-            output.append(i)
+        if not self._has_vertex(v):
+            return
 
-        return output
+        self.adj_matrix.set_many([(src, dst, 0) for src, dst, _ in self._incident_edges(v)])
+        self._tombstones.add(v)
+        self._free.append(v)
+        self.version += 1
+
+        if self._delta_log is not None:
+            self._delta_log.append([('remove_vertex', v)])
+
+    def compact(self) -> dict:
+        """
+        This method renumbers the remaining vertices densely in ascending order and rebuilds the storage at the new
+        size in one pass over the edges (dense stays dense, any other engine becomes sparse), emptying the free list.
+        Returns a dict mapping every remaining old ID to its new ID.
+        """
+
+        mapping = dict()
+        for v in range(self.v_count):
+            if v not in self._tombstones:
+                mapping[v] = len(mapping)
+
+        if isinstance(self.adj_matrix, DenseMatrix):
+            storage = DenseMatrix(self.adj_matrix.typecode)
+        else:
+            storage = SparseAdjacency()
+
+        storage.add_vertices(len(mapping))
+        storage.set_many([(mapping[src], mapping[dst], weight) for src, dst, weight in self.get_edges()])
+
+        self.adj_matrix = storage
+        self.v_count = len(mapping)
+        self._free = []
+        self._tombstones = set()
+        self.version += 1
+
+        if self._delta_log is not None:
+            self._delta_log.append([('compact',)])
+
+        return mapping
+
+    def _has_vertex(self, v) -> bool:
+        """
+        This method returns True if v is the ID of a vertex that has not been removed.
+        """
+
+        return 0 <= v < self.v_count and v not in self._tombstones
+
+    def _incident_edges(self, v: int) -> []:
+        """
+        This method returns every (src, dst, weight) edge leaving or entering v.
+        """
+
+        edges = [(v, dst, weight) for dst, weight in self.adj_matrix.neighbors(v)]
+        for src in range(self.v_count):
+            weight = self.adj_matrix.get(src, v)
+            if weight:
+                edges.append((src, v, weight))
+
+        return edges
+
+    def batch(self) -> DirectedBatch:
+        """
+        This method returns a transaction for use in a with block. Mutations made through it (add_vertex,
+        add_vertices, add_edge, add_edges_from, remove_edge) are buffered and applied together when the block ends:
+        repeated writes to an edge collapse into the last one, an add followed by a remove cancels out, and the
+        storage engine writes the remaining edges in one pass. The graph version, and with it every cache and index,
+        moves only once. If the block raises, nothing is applied; if applying fails, what was applied is undone.
+        """
+
+        return DirectedBatch(self)
+
+    def enable_delta_log(self, path=None) -> DeltaLog:
+        """
+        This method starts recording every change to the graph in an append-only DeltaLog (one entry per mutating
+        call or committed batch), which DeltaLog.replay() applies to a replica. With a path the entries are also
+        appended to that file as JSON lines.
+        """
+
+        self._delta_log = DeltaLog(path)
+        return self._delta_log
+
+    def disable_delta_log(self) -> None:
+        """
+        This method stops recording changes.
+        """
+
+        self._delta_log = None
+
+    def enable_cache(self, max_entries=1024, max_bytes=None) -> None:
+        """
+        This method turns on memoization of the query methods (dfs, bfs, has_cycle, dijkstra and friends). Results are
+        kept in a least recently used cache of at most max_entries results and, if given, max_bytes bytes. Any
+        add_vertex, add_edge or remove_edge bumps self.version, which invalidates every cached result.
+        """
+
+        self._cache = QueryCache(max_entries, max_bytes)
+
+    def disable_cache(self) -> None:
+        """
+        This method turns memoization off and drops the cached results.
+        """
+
+        self._cache = None
+
+    def cache_stats(self) -> dict:
+        """
+        This method returns the cache hit, miss, eviction and invalidation counters, or None if caching is off.
+        """
+
+        if self._cache is None:
+            return None
+        return self._cache.stats()
+
+    def build_reachability_index(self, method='auto', labels=3) -> ReachabilityIndex:
+        """
+        This method builds a reachability index over the condensation and attaches it, so reachable() stops
+        traversing the graph. method is 'closure' (component bitsets), 'interval' (GRAIL labels, for graphs too large
+        for bitsets) or 'auto'. add_edge() keeps the index valid when it can; after any other change it is rebuilt on
+        the next query. The index's stats() report its build time and memory.
+        """
+
+        self._reach_index = ReachabilityIndex(self.condensation(), method, labels)
+        return self._reach_index
+
+    def drop_reachability_index(self) -> None:
+        """
+        This method detaches the reachability index.
+        """
+
+        self._reach_index = None
+
+    def reachability_stats(self) -> dict:
+        """
+        This method returns the method, size, build time and maintenance counters of the reachability index, or None
+        if there is no index.
+        """
+
+        if self._reach_index is None:
+            return None
+        return self._reach_index.stats()
+
+    def reachable(self, u: int, v: int) -> bool:
+        """
+        This method returns True if there is a path from u to v. With a reachability index attached the answer comes
+        from the index (rebuilt first if the graph changed in a way it could not follow), otherwise a breadth first
+        search from u stops as soon as it meets v.
+        """
+
+        if not self._has_vertex(u) or not self._has_vertex(v):
+            return False
+
+        index = self._reach_index
+        if index is None:
+            return any(vertex == v for vertex in self.iter_bfs(u))
+
+        with index.lock:
+            if not index.is_current(self.version):
+                index.rebuild(self.condensation())
+            return index.reachable(u, v)
+
+    def instrument(self, callback=None) -> Instrumentation:
+        """
+        This method turns on traversal counters for iter_dfs/dfs, iter_bfs/bfs and the dijkstra family. Each call
+        produces a TraversalStats (vertices expanded, edges relaxed, pushes, pops, max frontier size, wall time) that
+        is stored on the returned Instrumentation and passed to callback if one is given. Results served from the
+        query cache do not run a traversal and are not counted.
+        """
+
+        self._instrumentation = Instrumentation(callback)
+        return self._instrumentation
+
+    def uninstrument(self) -> None:
+        """
+        This method turns the traversal counters off again, so the hot loops skip all counting.
+        """
+
+        self._instrumentation = None
+
+    def get_vertices(self) -> []:
+        """
+        This method returns an array filled with integers corresponding to the vertices present.
+        """
+        if len(self._tombstones) > 0:
+            return [v for v in range(self.v_count) if v not in self._tombstones]
+        return list(range(self.v_count))
 
     def get_edges(self) -> []:
         """
-        This method runs through all of the edges in the adjacency matrix and if any are greater than zero it
-        adds a tuple containing the edge source, destination, and weight to the output array.
+        This method runs through every row of the adjacency matrix and adds a tuple containing the edge source,
+        destination, and weight to the output array for each non-zero weight.
         """
 
         output = []
 
-        for i in range(len(self.adj_matrix)):
-            for j in range(len(self.adj_matrix[i])):
-
-                if self.adj_matrix[i][j] != 0:
-                    output.append((i, j, self.adj_matrix[i][j]))
+        for i in range(self.v_count):
+            for j, weight in self.adj_matrix.neighbors(i):
+                output.append((i, j, weight))
 
         return output
 
@@ -131,128 +484,933 @@ class DirectedGraph:
 
         for i in range(len(path) - 1):
 
-            if self.adj_matrix[path[i]][path[i + 1]] == 0:
+            if not 0 <= path[i] < self.v_count or not 0 <= path[i + 1] < self.v_count:
+                return False
+
+            if self.adj_matrix.get(path[i], path[i + 1]) == 0:
                 return False
 
         return True
 
+    @cached_query
     def dfs(self, v_start, v_end=None) -> []:
         """
-        This method performs a depth first search starting with v_start. It adds all the current node children to
-        the stack so they will be processed in ascending order. If a child has already been visited, it is not processed
-        when pulled from a stack. If the v_end node is found, the visited array is returned.
+        This method performs a depth first search starting with v_start by collecting the vertices yielded by
+        iter_dfs(). If the v_end node is found, the visited array is returned right away.
+        """
+
+        output = []
+
+        for vertex in self.iter_dfs(v_start):
+            output.append(vertex)
+            if vertex == v_end:
+                break
+
+        return output
+
+    @cached_query
+    def bfs(self, v_start, v_end=None) -> []:
+        """
+        This method performs a breadth first search of the graph by collecting the vertices yielded by iter_bfs(). If
+        v_end is found, the nodes visited array is immediately returned.
         """
 
-        if v_start < 0 or v_start >= len(self.adj_matrix):
-            return []
+        output = []
 
-        visited = []
-        stack = [v_start]
+        for vertex in self.iter_bfs(v_start):
+            output.append(vertex)
+            if vertex == v_end:
+                break
 
-        while len(stack) > 0:
+        return output
 
-            curr = stack.pop()
-            if curr not in visited:
+    def iter_dfs(self, v_start, with_info=False):
+        """
+        This method lazily performs a depth first search starting with v_start, yielding each vertex as it is visited
+        so the caller can stop at any point. It adds all the current node children to the stack so they will be
+        processed in ascending order. If a child has already been visited (checked in a bytearray), it is not processed
+        when pulled from the stack. With with_info=True, (vertex, depth, parent) tuples are yielded instead, where depth
+        and parent describe the search tree (parent is None for v_start). The graph must not change while iterating.
+        """
 
-                visited.append(curr)
-                if curr == v_end:
-                    return visited
+        if not self._has_vertex(v_start):
+            return
 
-                for i in range(len(self.adj_matrix[curr]) - 1, -1, -1):
+        stats = self._instrumentation.begin('dfs') if self._instrumentation is not None else None
+        visited = bytearray(self.v_count)
+        stack = [(v_start, 0, None)]
+        pops = 0
 
-                    if self.adj_matrix[curr][i] > 0:
-                        stack.append(i)
+        try:
+            while len(stack) > 0:
 
-        return visited
+                curr, depth, parent = stack.pop()
+                pops += 1
+                if not visited[curr]:
 
-    def bfs(self, v_start, v_end=None) -> []:
+                    visited[curr] = 1
+                    yield (curr, depth, parent) if with_info else curr
+
+                    children = self.adj_matrix.neighbors(curr)
+                    for i, _ in reversed(children):
+                        if not visited[i]:
+                            stack.append((i, depth + 1, curr))
+
+                    if stats is not None:
+                        stats.vertices_expanded += 1
+                        stats.edges_relaxed += len(children)
+                        stats.max_frontier = max(stats.max_frontier, len(stack))
+
+        finally:
+            if stats is not None:
+                # every push is either popped by now or still waiting in the stack
+                stats.pops = pops
+                stats.pushes = pops + len(stack)
+                self._instrumentation.end(stats)
+
+    def iter_bfs(self, v_start, with_info=False):
         """
-        This method performs a breadth first search of the graph. If v_end is found, the nodes visited array is
-        immediately returned. Child nodes are added to the queue in ascending order.
+        This method lazily performs a breadth first search of the graph, yielding each vertex as it is visited. Child
+        nodes are added to the queue in ascending order, and visited vertices are tracked in a bytearray. With
+        with_info=True, (vertex, depth, parent) tuples are yielded instead, where depth is the number of edges from
+        v_start. The graph must not change while iterating.
         """
 
-        if v_start < 0 or v_start >= len(self.adj_matrix):
-            return []
+        if not self._has_vertex(v_start):
+            return
+
+        stats = self._instrumentation.begin('bfs') if self._instrumentation is not None else None
+        visited = bytearray(self.v_count)
+        queue1 = deque([(v_start, 0, None)])
+        pops = 0
+
+        try:
+            while len(queue1) > 0:
+
+                curr, depth, parent = queue1.popleft()
+                pops += 1
+                if not visited[curr]:
+
+                    visited[curr] = 1
+                    yield (curr, depth, parent) if with_info else curr
 
-        visited = []
-        queue1 = deque([v_start])
+                    children = self.adj_matrix.neighbors(curr)
+                    for i, _ in children:
+                        if not visited[i]:
+                            queue1.append((i, depth + 1, curr))
+
+                    if stats is not None:
+                        stats.vertices_expanded += 1
+                        stats.edges_relaxed += len(children)
+                        stats.max_frontier = max(stats.max_frontier, len(queue1))
+
+        finally:
+            if stats is not None:
+                # every push is either popped by now or still waiting in the queue
+                stats.pops = pops
+                stats.pushes = pops + len(queue1)
+                self._instrumentation.end(stats)
+
+    def bfs_levels(self, v_start):
+        """
+        This method performs a bit-parallel breadth first search over the matrix rows packed into integers (bit j of
+        row i is set when there is an edge i -> j). Each level is expanded by OR-ing the rows of the frontier vertices
+        and masking out the vertices already seen, so a whole row is handled per operation instead of per cell.
+        Returns a (reachable, levels) tuple: every vertex reachable from v_start in ascending order, and the list of
+        BFS levels (levels[d] holds the vertices d edges away, ascending). An invalid v_start gives ([], []).
+        """
 
-        while len(queue1) > 0:
+        if not self._has_vertex(v_start):
+            return [], []
 
-            curr = queue1.popleft()
-            if curr not in visited:
+        rows = self._bit_rows()
+        seen = frontier = 1 << v_start
+        levels = []
 
-                visited.append(curr)
+        while frontier:
 
-                if curr == v_end:
-                    return visited
+            members = _bit_positions(frontier)
+            levels.append(members)
 
-                for i in range(len(self.adj_matrix[curr])):
+            nextFrontier = 0
+            for u in members:
+                nextFrontier |= rows[u]
 
-                    if self.adj_matrix[curr][i] > 0:
-                        queue1.append(i)
+            frontier = nextFrontier & ~seen
+            seen |= frontier
 
-        return visited
+        return _bit_positions(seen), levels
 
+    def bfs_levels_many(self, sources) -> dict:
+        """
+        This method runs one breadth first search for all sources at once, giving every source one bit lane: bit k of
+        seen[v] is set once v was reached from the k-th source. A level pushes the frontier lanes of every frontier
+        vertex u along its edges (lanes[v] |= frontier[u] for each edge u -> v), so one OR advances every source that
+        reached u at that depth, and v keeps only the bits it had not seen yet. This needs nothing but the row
+        neighbors, which are read from the packed rows. With NumPy the same search runs on arrays, see
+        _bfs_lanes_numpy(). Returns a dict of source -> (reachable, levels) as bfs_levels() gives them; an invalid
+        source gives ([], []).
+        """
+
+        starts = [src for src in dict.fromkeys(sources) if self._has_vertex(src)]
+        lane = {src: k for k, src in enumerate(starts)}
+
+        if np is not None and len(starts) > 0:
+            reachable, levels = self._bfs_lanes_numpy(starts)
+            return {src: (reachable[lane[src]], levels[lane[src]]) if src in lane else ([], []) for src in sources}
+
+        rows = self._bit_rows()
+        successors = dict()
+        seen = [0] * self.v_count
+        frontier = dict()
+        levels = [[] for _ in starts]
+
+        for src, k in lane.items():
+            seen[src] = frontier[src] = 1 << k
+
+        while frontier:
+
+            members = dict()
+            for v in sorted(frontier):
+                for k in _bit_positions(frontier[v]):
+                    members.setdefault(k, []).append(v)
+            for k, vertices in members.items():
+                levels[k].append(vertices)
+
+            lanes = dict()
+            for u, bits in frontier.items():
+                targets = successors.get(u)
+                if targets is None:
+                    targets = successors[u] = _bit_positions(rows[u])
+                for v in targets:
+                    lanes[v] = lanes.get(v, 0) | bits
+
+            frontier = dict()
+            for v, bits in lanes.items():
+                new = bits & ~seen[v]
+                if new:
+                    seen[v] |= new
+                    frontier[v] = new
+
+        reachable = [[] for _ in starts]
+        for v, bits in enumerate(seen):
+            if bits:
+                for k in _bit_positions(bits):
+                    reachable[k].append(v)
+
+        return {src: (reachable[lane[src]], levels[lane[src]]) if src in lane else ([], []) for src in sources}
+
+    def _bfs_lanes_numpy(self, starts):
+        """
+        This method runs the lane search of bfs_levels_many() with NumPy: the lanes of a vertex are a row of 64-bit
+        words, the edges are grouped by source, and each level gathers the edges leaving the frontier, ORs their lanes
+        together per destination with reduceat and keeps the bits the destinations had not seen. Returns the
+        (reachable, levels) lists indexed by lane.
+        """
+
+        n = self.v_count
+        lanes = len(starts)
+        degree, first, dst = self._lane_edges_by_source()
+
+        lane = np.arange(lanes)
+        active = np.array(starts, dtype=np.int64)
+        bits = np.zeros((lanes, (lanes + 63) // 64), dtype=np.uint64)
+        bits[lane, lane // 64] = np.left_shift(np.uint64(1), (lane % 64).astype(np.uint64))
+        order = np.argsort(active)
+        active, bits = active[order], bits[order]
+
+        seen = np.zeros((n, bits.shape[1]), dtype=np.uint64)
+        seen[active] = bits
+        levels = [[] for _ in starts]
+
+        while len(active) > 0:
+
+            for k, members in enumerate(_lane_members(active, bits, lanes)):
+                if len(members) > 0:
+                    levels[k].append(members)
+
+            counts = degree[active]
+            total = int(counts.sum())
+            if total == 0:
+                break
+
+            # the edges of every frontier vertex, with the frontier lanes repeated once per edge
+            edges = np.repeat(first[active] - (np.cumsum(counts) - counts), counts) + np.arange(total)
+            targets = dst[edges]
+            pushed = np.repeat(bits, counts, axis=0)
+
+            order = np.argsort(targets, kind='stable')
+            targets, pushed = targets[order], pushed[order]
+            heads = np.flatnonzero(np.concatenate(([True], targets[1:] != targets[:-1])))
+            reached = targets[heads]
+            new = np.bitwise_or.reduceat(pushed, heads, axis=0) & ~seen[reached]
+
+            keep = new.any(axis=1)
+            active, bits = reached[keep], new[keep]
+            seen[active] |= bits
+
+        return _lane_members(np.arange(n), seen, lanes), levels
+
+    def _lane_edges_by_source(self):
+        """
+        This method returns (degree, first, destinations) NumPy arrays with the edges grouped by source: the edges of
+        u are destinations[first[u]:first[u] + degree[u]]. Like the packed rows they are rebuilt only when the graph
+        version changed.
+        """
+
+        if self._lane_edges_version == self.version:
+            return self._lane_edges
+
+        n = self.v_count
+        storage = self.adj_matrix
+
+        if isinstance(storage, DenseMatrix):
+            # row-major nonzero is already grouped by source, and much faster than the column order of _edge_arrays()
+            cells = np.frombuffer(storage.data, dtype=storage.typecode)
+            src, dst = np.nonzero(cells.reshape(storage.capacity, storage.capacity)[:n, :n])
+        else:
+            src, dst, _ = self._edge_arrays()
+            dst = dst[np.argsort(src, kind='stable')]
+
+        degree = np.bincount(src, minlength=n)
+        self._lane_edges = (degree, np.cumsum(degree) - degree, dst)
+        self._lane_edges_version = self.version
+        return self._lane_edges
+
+    def _bit_rows(self) -> []:
+        """
+        This method returns the adjacency rows packed into Python integers, rebuilding them only when the graph
+        version changed. With NumPy and dense storage the rows are packed with np.packbits, otherwise every row is
+        written as a binary string (highest vertex first) and parsed with int(..., 2).
+        """
+
+        if self._row_bits_version == self.version:
+            return self._row_bits
+
+        n = self.v_count
+        if np is not None and isinstance(self.adj_matrix, DenseMatrix) and n > 0:
+            cells = np.frombuffer(self.adj_matrix.data, dtype=self.adj_matrix.typecode)
+            matrix = cells.reshape(self.adj_matrix.capacity, self.adj_matrix.capacity)[:n, :n]
+            packed = np.packbits(matrix != 0, axis=1, bitorder='little')
+            rows = [int.from_bytes(row.tobytes(), 'little') for row in packed]
+        else:
+            rows = []
+            for i in range(n):
+                digits = bytearray(b'0') * n
+                for j, _ in self.adj_matrix.neighbors(i):
+                    digits[n - 1 - j] = 49
+                rows.append(int(digits, 2) if n > 0 else 0)
+
+        self._row_bits = rows
+        self._row_bits_version = self.version
+        return rows
+
+    @cached_query
     def has_cycle(self):
         """
-        This method uses a backtracking helper function to determine if there are any cycles in the graph. For every
-        starting node, it follows every path using backtracking and keeps a record of nodes visited in that current
-        attempt. If it sees the same node twice in the same attempt, then it knows a cycle has occurred.
+        This method returns True if the graph contains a directed cycle. It runs the iterative colouring search below,
+        which stops at the first back edge it finds, so it is O(V + E) and never recurses.
+        """
+
+        cycle, _ = self._cycle_search()
+        return cycle is not None
+
+    @cached_query
+    def find_cycle(self) -> []:
+        """
+        This method returns the vertices of one directed cycle in the order they are traversed (the edge from the last
+        vertex back to the first closes it), or None if the graph is acyclic.
         """
 
-        def backtracking(i, currDict):
+        cycle, _ = self._cycle_search()
+        return cycle
+
+    @cached_query
+    def topological_order(self) -> []:
+        """
+        This method returns the vertices in topological order (every edge goes from an earlier to a later vertex), or
+        None if the graph contains a cycle.
+        """
+
+        _, order = self._cycle_search()
+        if order is not None and len(self._tombstones) > 0:
+            order = [v for v in order if v not in self._tombstones]
+        return order
+
+    def _cycle_search(self):
+        """
+        This method performs a depth first search from every unvisited vertex in ascending order, colouring vertices
+        white (0, unvisited), grey (1, on the current path) and black (2, finished). The search keeps its own stack of
+        (vertex, remaining children) pairs instead of recursing. Reaching a grey vertex means a back edge, and the grey
+        part of the stack from that vertex onwards is returned as the cycle. Otherwise finished vertices are recorded in
+        postorder, whose reverse is a topological order. Returns a (cycle, order) tuple with exactly one of them None.
+        """
+
+        colour = bytearray(self.v_count)
+        postorder = []
+
+        for root in range(self.v_count):
+
+            if colour[root] != 0:
+                continue
 
-            for j in range(len(self.adj_matrix[i])):
+            colour[root] = 1
+            stack = [(root, iter(self.adj_matrix.neighbors(root)))]
 
-                if self.adj_matrix[i][j] > 0 and j in currDict:
-                    self.flag = [1]
+            while len(stack) > 0:
 
-                elif self.adj_matrix[i][j] > 0 and j not in currDict:
+                curr, children = stack[-1]
 
-                    currDict[j] = 1
-                    backtracking(j, currDict)
-                    del currDict[j]
+                for child, _ in children:
 
-        for i in range(len(self.adj_matrix)):
+                    if colour[child] == 0:
+                        colour[child] = 1
+                        stack.append((child, iter(self.adj_matrix.neighbors(child))))
+                        break
 
-            currDict = {i: 1}
-            backtracking(i, currDict)
+                    if colour[child] == 1:
+                        path = [vertex for vertex, _ in stack]
+                        return path[path.index(child):], None
 
-        if self.flag == [0]:
+                else:
+                    colour[curr] = 2
+                    postorder.append(curr)
+                    stack.pop()
+
+        postorder.reverse()
+        return None, postorder
+
+    def condensation(self) -> Condensation:
+        """
+        This method returns the condensation of the graph (one node per strongly connected component, found with an
+        iterative Tarjan search). It is rebuilt only when the graph version changed, so repeated reachability, ordering
+        and cycle questions are answered from the much smaller component graph.
+        """
+
+        if self._condensation is None or self._condensation.version != self.version:
+            self._condensation = Condensation(self.v_count, self.adj_matrix.neighbors, self.version)
+
+        return self._condensation
+
+    def strongly_connected_components(self) -> []:
+        """
+        This method returns the strongly connected components as lists of vertices (ascending), with the components
+        themselves in topological order: no edge leads from a later component back to an earlier one.
+        """
+
+        return [list(members) for members in self.condensation().members
+                if len(members) > 1 or members[0] not in self._tombstones]
+
+    def mutually_reachable(self, u: int, v: int) -> bool:
+        """
+        This method returns True if u and v can each reach the other, that is if they share a component.
+        """
+
+        if not self._has_vertex(u) or not self._has_vertex(v):
             return False
-        else:
-            return True
 
-    def dijkstra(self, src: int) -> []:
+        component = self.condensation().component
+        return component[u] == component[v]
+
+    def component_reachable(self, u: int, v: int) -> bool:
+        """
+        This method returns True if there is a route from u to v, answered by component reachability on the
+        condensation instead of a traversal of the graph.
+        """
+
+        if not self._has_vertex(u) or not self._has_vertex(v):
+            return False
+
+        condensed = self.condensation()
+        return condensed.reaches(condensed.component[u], condensed.component[v])
+
+    def edge_in_cycle(self, src: int, dst: int) -> bool:
+        """
+        This method returns True if the edge src -> dst exists and lies on a directed cycle, which is the case exactly
+        when both ends are in the same strongly connected component.
+        """
+
+        if not self._has_vertex(src) or not self._has_vertex(dst):
+            return False
+        if not self.adj_matrix.get(src, dst):
+            return False
+
+        component = self.condensation().component
+        return component[src] == component[dst]
+
+    @cached_query
+    def dijkstra(self, src, dst=None) -> []:
         """
         This method uses dijkstra's algorithm to find the shortest route from src to all other nodes it can reach.
-        If it cannot find a path to a node, that distance is left as infinite. It uses a priority queue and only
-        performs operations to a node if it hasn't been visited before, such as updating its distance and adding
-        its children to the priority queue.
+        If it cannot find a path to a node, that distance is left as infinite. src may be a single vertex or a list of
+        vertices (the distance to the closest of them is returned). If dst is given, the search stops as soon as dst
+        is settled, and only the vertices settled before it have their final distance filled in.
         """
 
+        distances, _ = self._dijkstra(src, dst)
+        return distances
+
+    @cached_query
+    def dijkstra_paths(self, src, dst=None):
+        """
+        This method runs the same search as dijkstra() and returns a (distances, predecessors) tuple, where
+        predecessors[v] is the vertex before v on its shortest route (None for sources and unreached vertices).
+        """
+
+        return self._dijkstra(src, dst)
+
+    @cached_query
+    def shortest_path(self, src, dst: int) -> []:
+        """
+        This method returns the vertices on a shortest route from src (a vertex or list of vertices) to dst, stopping
+        the search once dst is settled. If dst cannot be reached, None is returned.
+        """
+
+        if dst < 0 or dst >= self.v_count:
+            return None
+
+        distances, predecessors = self._dijkstra(src, dst)
+
+        if distances[dst] == float('inf'):
+            return None
+
+        path = [dst]
+        while predecessors[path[-1]] is not None:
+            path.append(predecessors[path[-1]])
+
+        path.reverse()
+        return path
+
+    def build_landmarks(self, count=8, first=0) -> LandmarkIndex:
+        """
+        This method picks count landmark vertices farthest-first and stores Dijkstra distance tables to and from each
+        of them, which shortest_path_alt() uses as A* lower bounds. The index's stats() report the landmarks, table
+        memory and build time. Any later change to the graph makes shortest_path_alt() rebuild the tables.
+        """
+
+        self._landmarks = LandmarkIndex.build(self, count, first)
+        return self._landmarks
+
+    def landmark_stats(self) -> dict:
+        """
+        This method returns the landmarks, table memory and build time of the landmark index, or None if there is none.
+        """
+
+        if self._landmarks is None:
+            return None
+        return self._landmarks.stats()
+
+    def shortest_path_alt(self, src: int, dst: int) -> []:
+        """
+        This method returns the vertices on a shortest route from src to dst, or None if there is none, like
+        shortest_path() but with an A* search guided by the landmark bounds, so the search heads towards dst instead
+        of growing uniformly in every direction. Landmarks are built with the defaults first if needed.
+        """
+
+        if not self._has_vertex(src) or not self._has_vertex(dst):
+            return None
+
+        if self._landmarks is None or self._landmarks.version != self.version:
+            count = 8 if self._landmarks is None else len(self._landmarks.landmarks)
+            self._landmarks = LandmarkIndex.build(self, count)
+
+        return self._alt_search(src, dst, self._landmarks.heuristic(dst))
+
+    def _alt_search(self, src: int, dst: int, lower_bound) -> []:
+        """
+        This method runs A* from src to dst with the heap keyed on distance so far plus lower_bound(vertex). The ALT
+        bounds are consistent, so a vertex is settled the first time it is popped just like in _dijkstra(), and the
+        search stops when dst is popped. Vertices whose bound is infinite cannot reach dst and are never pushed.
+        """
+
+        stats = self._instrumentation.begin('alt') if self._instrumentation is not None else None
+        inf = float('inf')
+        tentative = {src: 0}
+        predecessors = {src: None}
+        settled = bytearray(self.v_count)
+        priorityQueue1 = [(lower_bound(src), 0, src)]
+        pops = 0
+        found = False
+
+        while len(priorityQueue1) > 0:
+
+            _, currDistance, currIndex = heapq.heappop(priorityQueue1)
+            pops += 1
+            if settled[currIndex]:
+                continue
+
+            settled[currIndex] = 1
+            if currIndex == dst:
+                found = True
+                break
+
+            edges = self.adj_matrix.neighbors(currIndex)
+            for j, weight in edges:
+
+                combinedDistance = currDistance + weight
+                if combinedDistance < tentative.get(j, inf):
+                    bound = lower_bound(j)
+                    if bound == inf:
+                        continue
+                    tentative[j] = combinedDistance
+                    predecessors[j] = currIndex
+                    heapq.heappush(priorityQueue1, (combinedDistance + bound, combinedDistance, j))
+
+            if stats is not None:
+                stats.vertices_expanded += 1
+                stats.edges_relaxed += len(edges)
+                stats.max_frontier = max(stats.max_frontier, len(priorityQueue1))
+
+        if stats is not None:
+            stats.pops = pops
+            stats.pushes = pops + len(priorityQueue1)
+            self._instrumentation.end(stats)
+
+        if not found:
+            return None
+
+        path = [dst]
+        while predecessors[path[-1]] is not None:
+            path.append(predecessors[path[-1]])
+
+        path.reverse()
+        return path
+
+    def reverse(self, storage=None):
+        """
+        This method returns a new graph with every edge turned around (same weights), stored in the given engine.
+        """
+
+        graph = DirectedGraph(storage=storage)
+        graph.add_vertices(self.v_count)
+        graph.add_edges_from([(dst, src, weight) for src, dst, weight in self.get_edges()])
+
+        return graph
+
+    def dijkstra_many(self, sources, workers=None):
+        """
+        This method runs dijkstra() for every source on a pool of worker processes that share one copy of the storage
+        through shared memory, yielding (source, distances) tuples as they complete. workers defaults to the number of
+        CPUs. The graph must not change until the generator is exhausted or closed.
+        """
+
+        return dijkstra_many(self, sources, workers)
+
+    def bfs_many(self, sources, workers=None):
+        """
+        This method runs bfs() for every source on a pool of worker processes like dijkstra_many(), yielding
+        (source, visit order) tuples as they complete.
+        """
+
+        return bfs_many(self, sources, workers)
+
+    def _dijkstra(self, src, dst=None):
+        """
+        This method seeds the priority queue with every valid source at distance 0. A vertex is settled the first time
+        it is popped and later stale entries for it are skipped. A neighbor is only pushed when the new route improves
+        its tentative distance, and that push also records the predecessor. The loop ends early once dst is settled.
+        Returns a (distances, predecessors) tuple.
+        """
+
+        sources = [src] if isinstance(src, int) else src
+        tentative = [float('inf')] * self.v_count
         output = [float('inf')] * self.v_count
-        visitedNodes = dict()
-        priorityQueue1 = [(0, src)]
+        predecessors = [None] * self.v_count
+        settled = bytearray(self.v_count)
+        priorityQueue1 = []
+
+        for vertex in sources:
+            if 0 <= vertex < self.v_count and tentative[vertex] != 0 and vertex not in self._tombstones:
+                tentative[vertex] = 0
+                priorityQueue1.append((0, vertex))
+
+        heapq.heapify(priorityQueue1)
+        stats = self._instrumentation.begin('dijkstra') if self._instrumentation is not None else None
+        pops = 0
 
         while len(priorityQueue1) > 0:
 
             currDistance, currIndex = heapq.heappop(priorityQueue1)
-            if currIndex not in visitedNodes:
+            pops += 1
+            if settled[currIndex]:
+                continue
+
+            settled[currIndex] = 1
+            output[currIndex] = currDistance
+            if currIndex == dst:
+                break
+
+            edges = self.adj_matrix.neighbors(currIndex)
+            for j, weight in edges:
+
+                combinedDistance = currDistance + weight
+                if combinedDistance < tentative[j]:
+                    tentative[j] = combinedDistance
+                    predecessors[j] = currIndex
+                    heapq.heappush(priorityQueue1, (combinedDistance, j))
+
+            if stats is not None:
+                stats.vertices_expanded += 1
+                stats.edges_relaxed += len(edges)
+                stats.max_frontier = max(stats.max_frontier, len(priorityQueue1))
+
+        if stats is not None:
+            # the heap only shrinks by popping, so every push was either popped or is still queued
+            stats.pops = pops
+            stats.pushes = pops + len(priorityQueue1)
+            self._instrumentation.end(stats)
+
+        return output, predecessors
+
+    @cached_query
+    def all_pairs_shortest_paths(self, next_hop=False, as_array=False):
+        """
+        This method returns a v_count x v_count distance matrix where entry [i][j] is the length of the shortest route
+        from i to j (0 on the diagonal, infinite when there is no route). If next_hop is True, a (distances, hops) tuple
+        is returned instead, where hops[i][j] is the vertex after i on a shortest route to j (None when j is i or cannot
+        be reached). With NumPy installed the matrix is computed with vectorized min-plus relaxations, see
+        _all_pairs_numpy(), otherwise by running dijkstra from every vertex; integer weights give integer distances
+        either way. With as_array=True (NumPy only) the results are left as NumPy arrays instead of nested lists,
+        which avoids boxing V * V numbers: float64 distances with inf, and int32 hops with -1 for none.
+        """
+
+        if np is not None:
+            return self._all_pairs_numpy(next_hop, as_array)
+        if as_array:
+            raise ImportError('all_pairs_shortest_paths(as_array=True) needs NumPy')
 
-                visitedNodes[currIndex] = currDistance
-                for j in range(len(self.adj_matrix[currIndex])):
+        distances = []
+        hops = []
 
-                    if self.adj_matrix[currIndex][j] != 0:
+        for i in range(self.v_count):
 
-                        combinedDistance = currDistance + self.adj_matrix[currIndex][j]
-                        heapq.heappush(priorityQueue1, (combinedDistance, j))
+            row, predecessors = self._dijkstra(i)
+            distances.append(row)
 
-        for key in visitedNodes:
-            output[key] = visitedNodes[key]
+            if next_hop:
+                # weights are positive, so a vertex always comes after its predecessor in distance order
+                hopRow = [None] * self.v_count
+                for j in sorted(range(self.v_count), key=row.__getitem__):
 
-        return output
+                    if predecessors[j] is not None:
+                        hopRow[j] = j if predecessors[j] == i else hopRow[predecessors[j]]
+
+                hops.append(hopRow)
+
+        if next_hop:
+            return distances, hops
+        return distances
+
+    def _edge_arrays(self):
+        """
+        This method returns (sources, destinations, weights) NumPy arrays of every edge, ordered by destination and
+        then source. Whole weights come back as an integer array.
+        """
+
+        n = self.v_count
+        storage = self.adj_matrix
+
+        if isinstance(storage, DenseMatrix):
+            cells = np.frombuffer(storage.data, dtype=storage.typecode)
+            matrix = cells.reshape(storage.capacity, storage.capacity)[:n, :n]
+            dst, src = np.nonzero(matrix.T)
+            weight = matrix[src, dst]
+            # a 'd' buffer without float cells only holds ints, see DenseMatrix.get()
+            whole = weight.dtype.kind == 'f' and len(storage.floats) == 0 and np.all(weight == np.floor(weight))
+            if whole and (len(weight) == 0 or weight.max() < 2 ** 62):
+                weight = weight.astype(np.int64)
+            return src, dst, weight
+
+        edges = sorted(self.get_edges(), key=lambda edge: (edge[1], edge[0]))
+        src = np.array([edge[0] for edge in edges], dtype=np.int64)
+        dst = np.array([edge[1] for edge in edges], dtype=np.int64)
+        weight = np.array([edge[2] for edge in edges], dtype=None if len(edges) > 0 else np.int64)
+        if weight.dtype.kind not in 'iuf':
+            weight = weight.astype(np.float64)
+        return src, dst, weight
+
+    def _all_pairs_numpy(self, next_hop, as_array):
+        """
+        This method fills a distance matrix with the edge weights and relaxes it with NumPy. Integer weights are kept
+        in an int32 matrix (int64 if their total is too large) with a sentinel for "no route", so the work is done on
+        half the bytes and the distances come back exact; any float weight makes it a float64 matrix with inf. The
+        matrix is kept transposed (row j holds the distances into j) so both steps below work on whole rows. Sparse
+        graphs are relaxed with _min_plus_rounds() first; if that has not converged within half the work of a
+        Floyd-Warshall, _floyd_warshall() finishes from where it stopped.
+        """
+
+        n = self.v_count
+        src, dst, weight = self._edge_arrays()
+
+        total = float(weight.sum(dtype=np.float64)) if len(weight) > 0 else 0.0
+        if weight.dtype.kind in 'iu' and total < 2 ** 29:
+            dtype, unreachable = np.int32, 2 ** 30 - 1
+        elif weight.dtype.kind in 'iu' and total < 2 ** 61:
+            dtype, unreachable = np.int64, 2 ** 62 - 1
+        else:
+            dtype, unreachable = np.float64, np.inf
+
+        weight = weight.astype(dtype)
+        into = np.full((n, n), unreachable, dtype=dtype)
+        into[dst, src] = weight
+        np.fill_diagonal(into, 0)
+        for v in self._tombstones:
+            into[:, v] = unreachable
+
+        hops = None
+        if next_hop:
+            hops = np.full((n, n), -1, dtype=np.int32)
+            hops[dst, src] = dst
+
+        if not self._min_plus_rounds(into, hops, src, dst, weight):
+            self._floyd_warshall(into, hops)
+
+        dist = into.T
+        missing = dist >= unreachable
+        if as_array:
+            dist = dist.astype(np.float64, order='C')
+            dist[missing] = np.inf
+            return (dist, np.ascontiguousarray(hops.T)) if next_hop else dist
+
+        if dtype is not np.float64:
+            dist = dist.astype(object)
+            dist[missing] = float('inf')
+        distances = dist.tolist()
+
+        if not next_hop:
+            return distances
+
+        hopRows = [[None if hop < 0 else hop for hop in row] for row in hops.T.tolist()]
+        return distances, hopRows
+
+    @staticmethod
+    def _min_plus_rounds(into, hops, src, dst, weight) -> bool:
+        """
+        This method repeatedly takes the min-plus product of the transposed distance matrix with the edge list: for an
+        edge u -> v, row v (distances into v from every source) is lowered to row u plus the weight wherever that is
+        shorter. Edges are taken in batches with at most one edge into each vertex, so a batch is a plain gather, add,
+        minimum and scatter of whole rows; later batches already see the earlier ones. After k rounds every route of
+        up to k edges is final. A round over E edges costs about as much as 3 * V * E Floyd-Warshall cell updates, so
+        rounds stop once they would have cost more than half a Floyd-Warshall. Returns True if the matrix converged.
+        """
+
+        n = len(into)
+        edges = len(src)
+        if edges == 0:
+            return True
+
+        # rank of every edge among the edges into the same vertex; edges are ordered by destination
+        first = np.zeros(edges, dtype=np.int64)
+        starts = np.flatnonzero(np.concatenate(([True], dst[1:] != dst[:-1])))
+        first[starts] = starts
+        rank = np.arange(edges) - np.maximum.accumulate(first)
+        order = np.argsort(rank, kind='stable')
+        cuts = np.searchsorted(rank[order], np.arange(rank.max() + 2))
+        batches = [order[cuts[r] + a:min(cuts[r + 1], cuts[r] + a + 1024)]
+                   for r in range(len(cuts) - 1) for a in range(0, cuts[r + 1] - cuts[r], 1024)]
+
+        spent = 0
+        while spent + 3 * edges <= n * n // 2:
+
+            spent += 3 * edges
+            converged = True
+
+            for batch in batches:
+
+                via = src[batch]
+                targets = dst[batch]
+                candidate = into[via]
+                candidate += weight[batch, None]
+                current = into[targets]
+                improved = candidate < current
+                if not improved.any():
+                    continue
+
+                converged = False
+                if hops is not None:
+                    # the next hop towards v is the one towards u, or v itself from u
+                    hop = hops[via]
+                    hop[np.arange(len(batch)), via] = targets
+                    hops[targets] = np.where(improved, hop, hops[targets])
+
+                into[targets] = np.where(improved, candidate, current)
+
+            if converged:
+                return True
+
+        return False
+
+    @staticmethod
+    def _floyd_warshall(into, hops) -> None:
+        """
+        This method runs a blocked Floyd-Warshall in place on the transposed distance matrix: intermediate vertices
+        are taken a block at a time, and each block of rows is relaxed through all of them with NumPy operations on a
+        strip small enough to stay in cache. The pivot rows are relaxed first, so every other strip reads their final
+        values for the round. Where going through k is shorter, the next hop becomes the one towards k.
+        """
+
+        n = len(into)
+        block = 64
+        candidate = np.empty((block, n), dtype=into.dtype)
+        improved = np.empty((block, n), dtype=bool)
+
+        for kStart in range(0, n, block):
+
+            # rows of the pivot block only depend on themselves for these k, so they go first
+            starts = [kStart] + [i for i in range(0, n, block) if i != kStart]
+            for iStart in starts:
+
+                strip = into[iStart:iStart + block]
+                rows = len(strip)
+                for k in range(kStart, min(kStart + block, n)):
+
+                    np.add(strip[:, k, None], into[k], out=candidate[:rows])
+                    if hops is not None:
+                        np.less(candidate[:rows], strip, out=improved[:rows])
+                        np.copyto(hops[iStart:iStart + block], hops[k], where=improved[:rows])
+                    np.minimum(strip, candidate[:rows], out=strip)
+
+
+class FrozenDirectedGraph(DirectedGraph):
+    """
+    Class to implement a read-only snapshot of a DirectedGraph
+    - the adjacency is a CSRAdjacency, so neighbor lists are contiguous slices in ascending order
+    - every method that would change the graph raises TypeError
+    - the version is the one of the graph it was frozen from
+    """
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        This method builds the snapshot of graph in one pass over its edges. CSR storage that was never written to
+        (a loaded snapshot) already has the right layout, and its arrays are shared instead of copied; the graph's
+        copy-on-write storage leaves them untouched when it is changed.
+        """
+
+        storage = graph.adj_matrix
+        if isinstance(storage, CSRAdjacency) and storage.rows is None:
+            storage = CSRAdjacency(storage.offsets, storage.targets, storage.weights, storage.floats)
+        else:
+            storage = CSRAdjacency.from_storage(storage)
+
+        frozen = cls(storage=storage)
+        frozen.v_count = graph.v_count
+        frozen.version = graph.version
+        frozen._tombstones = set(graph._tombstones)
+
+        return frozen
+
+    def freeze(self):
+        """
+        A snapshot is already frozen, so it is its own snapshot.
+        """
+
+        return self
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('a frozen graph cannot be changed, use the graph it was frozen from')
+
+    add_vertex = add_edge = add_vertices = add_edges_from = remove_edge = remove_vertex = compact = batch = _read_only
 
 
 if __name__ == '__main__':
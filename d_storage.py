@@ -0,0 +1,573 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Storage engines for the directed graph adjacency matrix
+
+from array import array
+import bisect
+
+# integer cell types DenseMatrix widens through, narrowest first
+INT_TYPECODES = ('B', 'H', 'i', 'q')
+
+# DenseMatrix capacity grows by this factor in each dimension, so the buffer is at most GROWTH ** 2 times the cells
+# in use (about 1.56x)
+GROWTH = 1.25
+
+
+class DenseMatrix:
+    """
+    Class to store a directed graph's adjacency matrix in one contiguous typed buffer
+    - a weight of 0 means there is no edge
+    - cells are kept row-major with a row stride equal to the current capacity
+    - capacity grows geometrically by GROWTH, so add_vertex() is amortized O(1)
+    - cells start at one byte; a weight that does not fit widens the buffer one step at a time through INT_TYPECODES,
+      and a float weight turns it into 'd'
+    - in a 'd' buffer whole numbers are read back as ints, except in the cells listed in floats, which were written as
+      floats (2.0); ints above 2 ** 53 lose precision there
+    - data may also be a memoryview over an external buffer (see from_buffer), it is copied on the first growth
+    - 20,000 vertices with weights under 256 take 400 MB when allocated at once with add_vertices() or reserve(), and
+      at most about 625 MB when grown one add_vertex() at a time; the old buffer is alive while a larger one is filled
+    """
+
+    def __init__(self, typecode='B'):
+        """
+        Create an empty matrix. The typecode picks the starting cell type: 'B' (one byte, weights under 256) by default,
+        'H', 'i' or 'q' for wider integer weights, 'd' for float weights.
+        """
+        self.typecode = typecode
+        self.size = 0
+        self.capacity = 0
+        self.data = array(typecode)
+        self.floats = set()
+
+    @classmethod
+    def from_buffer(cls, data, size: int, floats=()):
+        """
+        Wrap an existing size x size buffer of cells (for example a memoryview over a mapped file) without copying it.
+        floats holds the (src, dst) cells of a 'd' buffer that were written as floats, see get().
+        """
+        matrix = cls(data.format)
+        matrix.data = data
+        matrix.size = size
+        matrix.capacity = size
+        matrix.floats = set(floats)
+        return matrix
+
+    def __len__(self):
+        """
+        Return the number of vertices (rows) in the matrix.
+        """
+        return self.size
+
+    def __getitem__(self, i):
+        """
+        Return row i as a writable DenseRow view of length size, so adj_matrix[i][j] keeps working.
+        """
+        if i < 0:
+            i += self.size
+        if i < 0 or i >= self.size:
+            raise IndexError('matrix row index out of range')
+
+        return DenseRow(self, i)
+
+    def __iter__(self):
+        """
+        Yield every row in order.
+        """
+        for i in range(self.size):
+            yield self[i]
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Return the number of bytes held by the underlying buffer.
+        """
+        return self.data.itemsize * len(self.data)
+
+    def reserve(self, n: int) -> None:
+        """
+        This method makes sure the buffer can hold n vertices without growing again.
+        """
+
+        if n > self.capacity:
+            self._resize(n)
+
+    def _resize(self, capacity: int) -> None:
+        """
+        This method allocates a zeroed buffer with the new row stride and copies every existing row into it.
+        """
+
+        data = array(self.typecode, [0]) * (capacity * capacity)
+        target = memoryview(data)
+        source = memoryview(self.data)
+
+        for i in range(self.size):
+            old = i * self.capacity
+            new = i * capacity
+            target[new:new + self.size] = source[old:old + self.size]
+
+        target.release()
+        self.data = data
+        self.capacity = capacity
+
+    def _promote(self, typecode: str) -> None:
+        """
+        This method converts the whole buffer to a wider typecode.
+        """
+
+        self.data = array(typecode, self.data)
+        self.typecode = typecode
+
+    def _wider(self, weight) -> str:
+        """
+        This method returns the narrowest typecode wider than the current one that can hold weight: the next integer
+        type that fits an int weight, 'd' for anything else.
+        """
+
+        if isinstance(weight, int):
+            if self.typecode in INT_TYPECODES:
+                wider = INT_TYPECODES[INT_TYPECODES.index(self.typecode) + 1:]
+            else:
+                wider = ('q',)
+            for typecode in wider:
+                try:
+                    array(typecode, [weight])
+                    return typecode
+                except OverflowError:
+                    pass
+
+        return 'd'
+
+    def add_vertex(self) -> int:
+        """
+        This method adds a row and column of zeros, growing the capacity by GROWTH when the buffer is full. The cells of
+        the new row and column are already zero, so no per-row work is needed. Returns the new number of vertices.
+        """
+
+        if self.size == self.capacity:
+            self._resize(max(4, int(self.capacity * GROWTH)))
+
+        self.size += 1
+        return self.size
+
+    def add_vertices(self, n: int) -> int:
+        """
+        This method adds n vertices at once, growing the buffer at most once. Returns the new number of vertices.
+        """
+
+        if self.size + n > self.capacity:
+            self._resize(max(self.size + n, int(self.capacity * GROWTH)))
+
+        self.size += n
+        return self.size
+
+    def truncate(self, n: int) -> None:
+        """
+        This method drops every vertex from n onwards, keeping the capacity. Their rows and columns must already be all
+        zeros, which keeps the invariant add_vertex() relies on.
+        """
+
+        self.size = min(self.size, n)
+
+    def get(self, src: int, dst: int):
+        """
+        This method returns the weight stored at (src, dst). Indices are not bounds checked.
+        """
+
+        weight = self.data[src * self.capacity + dst]
+        if self.typecode != 'd' or not weight.is_integer() or (src, dst) in self.floats:
+            return weight
+        return int(weight)
+
+    def set(self, src: int, dst: int, weight) -> None:
+        """
+        This method stores the weight at (src, dst). Indices are not bounds checked. If the weight does not fit the
+        current typecode, the buffer is promoted first, see _wider().
+        """
+
+        try:
+            self.data[src * self.capacity + dst] = weight
+        except (TypeError, OverflowError, ValueError):
+            # an array raises OverflowError for an int that does not fit, a memoryview from from_buffer() ValueError
+            if self.typecode == 'd':
+                raise
+            self._promote(self._wider(weight))
+            self.set(src, dst, weight)
+            return
+
+        if self.typecode == 'd':
+            if weight and not isinstance(weight, int) and float(weight).is_integer():
+                self.floats.add((src, dst))
+            else:
+                self.floats.discard((src, dst))
+
+    def neighbors(self, src: int) -> []:
+        """
+        This method returns a list of (dst, weight) tuples for every edge leaving src, in ascending dst order.
+        """
+
+        start = src * self.capacity
+        row = self.data[start:start + self.size]
+
+        if self.typecode == 'd':
+            return [(dst, self.get(src, dst)) for dst, weight in enumerate(row) if weight]
+        return [(dst, weight) for dst, weight in enumerate(row) if weight]
+
+    def set_many(self, edges: []) -> None:
+        """
+        This method stores a list of (src, dst, weight) tuples in order, writing straight into the buffer. If a weight
+        does not fit the typecode, the whole list is written again through set(), which promotes the buffer. A 'd'
+        buffer is always written through set(), which keeps floats up to date.
+        """
+
+        if self.typecode == 'd':
+            for src, dst, weight in edges:
+                self.set(src, dst, weight)
+            return
+
+        data = self.data
+        capacity = self.capacity
+
+        try:
+            for src, dst, weight in edges:
+                data[src * capacity + dst] = weight
+        except (TypeError, OverflowError, ValueError):
+            for src, dst, weight in edges:
+                self.set(src, dst, weight)
+
+
+class DenseRow:
+    """
+    Class to present one row of a DenseMatrix as a sequence of weights, reading and writing through get() and set()
+    """
+
+    def __init__(self, matrix, i):
+        self.matrix = matrix
+        self.i = i
+
+    def __len__(self):
+        return self.matrix.size
+
+    def __getitem__(self, j):
+        if j < 0:
+            j += self.matrix.size
+        if j < 0 or j >= self.matrix.size:
+            raise IndexError('matrix column index out of range')
+        return self.matrix.get(self.i, j)
+
+    def __setitem__(self, j, weight):
+        if j < 0 or j >= self.matrix.size:
+            raise IndexError('matrix column index out of range')
+        self.matrix.set(self.i, j, weight)
+
+    def __iter__(self):
+        for j in range(self.matrix.size):
+            yield self.matrix.get(self.i, j)
+
+
+class SparseRow:
+    """
+    Class to present one row of a SparseAdjacency as a dense sequence of weights
+    """
+
+    def __init__(self, row, size):
+        self.row = row
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, j):
+        if j < 0:
+            j += self.size
+        if j < 0 or j >= self.size:
+            raise IndexError('matrix column index out of range')
+        return self.row.get(j, 0)
+
+    def __setitem__(self, j, weight):
+        if j < 0 or j >= self.size:
+            raise IndexError('matrix column index out of range')
+        if weight:
+            self.row[j] = weight
+        else:
+            self.row.pop(j, None)
+
+    def __iter__(self):
+        row = self.row
+        for j in range(self.size):
+            yield row.get(j, 0)
+
+
+class SparseAdjacency:
+    """
+    Class to store a directed graph as one dst -> weight dictionary per vertex
+    - memory is O(V + E) and traversals touch only existing edges
+    - rows are exposed as SparseRow views, so adj_matrix[i][j] and __str__ keep working
+    - the ascending neighbor order is cached per vertex until its neighbor set changes
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.rows = []
+        self.order = []
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.size
+        if i < 0 or i >= self.size:
+            raise IndexError('matrix row index out of range')
+        return SparseRow(self.rows[i], self.size)
+
+    def __iter__(self):
+        for i in range(self.size):
+            yield self[i]
+
+    def reserve(self, n: int) -> None:
+        """
+        Rows are created on demand, so there is nothing to preallocate.
+        """
+
+    def add_vertex(self) -> int:
+        """
+        This method adds an empty neighbor dictionary for the new vertex and returns the new number of vertices.
+        """
+
+        self.rows.append(dict())
+        self.order.append(None)
+        self.size += 1
+        return self.size
+
+    def add_vertices(self, n: int) -> int:
+        """
+        This method adds n empty neighbor dictionaries at once and returns the new number of vertices.
+        """
+
+        self.rows.extend(dict() for _ in range(n))
+        self.order.extend([None] * n)
+        self.size += n
+        return self.size
+
+    def truncate(self, n: int) -> None:
+        """
+        This method drops every vertex from n onwards. Edges into them must already be removed.
+        """
+
+        del self.rows[n:]
+        del self.order[n:]
+        self.size = min(self.size, n)
+
+    def get(self, src: int, dst: int):
+        """
+        This method returns the weight of the edge (src, dst), or 0 if there is no such edge.
+        """
+
+        return self.rows[src].get(dst, 0)
+
+    def set(self, src: int, dst: int, weight) -> None:
+        """
+        This method stores the weight of the edge (src, dst). A weight of 0 removes the edge.
+        """
+
+        row = self.rows[src]
+
+        if weight:
+            if dst not in row:
+                self.order[src] = None
+            row[dst] = weight
+
+        elif dst in row:
+            del row[dst]
+            self.order[src] = None
+
+    def neighbors(self, src: int) -> []:
+        """
+        This method returns a list of (dst, weight) tuples for every edge leaving src, in ascending dst order.
+        """
+
+        row = self.rows[src]
+        order = self.order[src]
+
+        if order is None:
+            order = sorted(row)
+            self.order[src] = order
+
+        return [(dst, row[dst]) for dst in order]
+
+    def set_many(self, edges: []) -> None:
+        """
+        This method stores a list of (src, dst, weight) tuples in order. A weight of 0 removes the edge.
+        """
+
+        rows = self.rows
+        order = self.order
+
+        for src, dst, weight in edges:
+
+            row = rows[src]
+            if weight:
+                if dst not in row:
+                    order[src] = None
+                row[dst] = weight
+
+            elif dst in row:
+                del row[dst]
+                order[src] = None
+
+
+class CSRAdjacency(SparseAdjacency):
+    """
+    Class to store a directed graph in compressed sparse row form
+    - the edges of v are targets[offsets[v]:offsets[v + 1]] (ascending) with the matching weights
+    - the three arrays may be memoryviews over a mapped file, nothing is copied to read them
+    - as in DenseMatrix, 'd' weights that are whole numbers are read back as ints, except at the edge positions listed
+      in floats, which were floats (2.0) in the graph they came from
+    - the first write turns the storage into per-vertex dictionaries (copy-on-write)
+    """
+
+    def __init__(self, offsets, targets, weights, floats=()):
+        super().__init__()
+        self.size = len(offsets) - 1
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.typecode = weights.typecode if isinstance(weights, array) else weights.format
+        self.floats = set(floats)
+        self.rows = None
+        self.order = None
+
+    @classmethod
+    def from_storage(cls, storage, typecode=None):
+        """
+        Build CSR arrays from any storage engine. Integer weights are stored as 'q' and anything else as 'd', unless
+        a typecode is given. The positions of whole float weights in a 'd' array are recorded in floats.
+        """
+
+        offsets = array('q', [0])
+        targets = array('q')
+        weights = []
+
+        for src in range(len(storage)):
+            for dst, weight in storage.neighbors(src):
+                targets.append(dst)
+                weights.append(weight)
+            offsets.append(len(targets))
+
+        if typecode is None:
+            typecode = 'q' if all(isinstance(weight, int) for weight in weights) else 'd'
+
+        floats = ()
+        if typecode == 'd':
+            floats = [i for i, weight in enumerate(weights)
+                      if not isinstance(weight, int) and float(weight).is_integer()]
+
+        return cls(offsets, targets, array(typecode, weights), floats)
+
+    def _weights(self, start: int, end: int):
+        """
+        This method returns the weights of the edges at positions start to end as the graph stored them, see floats.
+        """
+
+        weights = self.weights[start:end]
+        if self.typecode != 'd':
+            return weights
+
+        floats = self.floats
+        return [int(weight) if weight.is_integer() and i not in floats else weight
+                for i, weight in enumerate(weights, start)]
+
+    def __getitem__(self, i):
+        if self.rows is not None:
+            return super().__getitem__(i)
+        if i < 0:
+            i += self.size
+        if i < 0 or i >= self.size:
+            raise IndexError('matrix row index out of range')
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return SparseRow(dict(zip(self.targets[start:end], self._weights(start, end))), self.size)
+
+    def _materialize(self) -> None:
+        """
+        This method copies the CSR arrays into one dictionary per vertex, after which the SparseAdjacency methods
+        take over.
+        """
+
+        if self.rows is not None:
+            return
+
+        offsets, targets = self.offsets, self.targets
+        self.rows = [dict(zip(targets[offsets[v]:offsets[v + 1]], self._weights(offsets[v], offsets[v + 1])))
+                     for v in range(self.size)]
+        self.order = [None] * self.size
+        self.offsets = self.targets = self.weights = None
+        self.floats = set()
+
+    def add_vertex(self) -> int:
+        self._materialize()
+        return super().add_vertex()
+
+    def add_vertices(self, n: int) -> int:
+        self._materialize()
+        return super().add_vertices(n)
+
+    def truncate(self, n: int) -> None:
+        self._materialize()
+        super().truncate(n)
+
+    def set(self, src: int, dst: int, weight) -> None:
+        self._materialize()
+        super().set(src, dst, weight)
+
+    def set_many(self, edges: []) -> None:
+        self._materialize()
+        super().set_many(edges)
+
+    def get(self, src: int, dst: int):
+        """
+        This method returns the weight of the edge (src, dst), or 0 if there is no such edge, with a binary search
+        over src's targets.
+        """
+
+        if self.rows is not None:
+            return super().get(src, dst)
+
+        start, end = self.offsets[src], self.offsets[src + 1]
+        i = bisect.bisect_left(self.targets, dst, start, end)
+        if i < end and self.targets[i] == dst:
+            return self._weights(i, i + 1)[0]
+        return 0
+
+    def neighbors(self, src: int) -> []:
+        """
+        This method returns a list of (dst, weight) tuples for every edge leaving src, in ascending dst order.
+        """
+
+        if self.rows is not None:
+            return super().neighbors(src)
+
+        start, end = self.offsets[src], self.offsets[src + 1]
+        return list(zip(self.targets[start:end], self._weights(start, end)))
+
+
+STORAGE_ENGINES = {
+    'dense': DenseMatrix,
+    'sparse': SparseAdjacency,
+}
+
+
+def make_storage(storage=None):
+    """
+    Return a storage engine for a directed graph. storage may be None (dense), the name of one of
+    STORAGE_ENGINES, or an engine instance which is returned as is.
+    """
+
+    if storage is None:
+        return DenseMatrix()
+
+    if isinstance(storage, str):
+        if storage not in STORAGE_ENGINES:
+            raise ValueError(f'unknown storage engine {storage!r}, expected one of {sorted(STORAGE_ENGINES)}')
+        return STORAGE_ENGINES[storage]()
+
+    return storage
@@ -0,0 +1,108 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Landmark distance tables for A* search with triangle inequality bounds (ALT)
+
+from array import array
+import time
+
+INF = float('inf')
+
+
+class LandmarkIndex:
+    """
+    Class to hold ALT landmark tables for a directed graph
+    - forward[i][v] is the distance from landmark i to v, backward[i][v] the distance from v to landmark i
+    - by the triangle inequality d(v, t) >= d(L, t) - d(L, v) and d(v, t) >= d(v, L) - d(t, L) for every landmark L,
+      and the largest of these bounds drives the A* search
+    - the bounds stay valid while edges are only removed or made heavier; the graph rebuilds the index after any
+      change because it cannot tell which kind happened
+    """
+
+    def __init__(self, landmarks, forward, backward, version=None, build_seconds=0.0):
+        self.landmarks = landmarks
+        self.forward = [array('d', table) for table in forward]
+        self.backward = [array('d', table) for table in backward]
+        self.version = version
+        self.build_seconds = build_seconds
+
+    @classmethod
+    def build(cls, graph, count=8, first=0):
+        """
+        Pick count landmarks and fill their tables with graph.dijkstra() on the graph and on its reverse. Landmarks are
+        chosen farthest-first: after first, each new landmark is the vertex with the largest round trip distance to its
+        closest landmark so far, preferring vertices no landmark reaches at all (another component).
+        """
+
+        start = time.perf_counter()
+        reverse = graph.reverse(storage='sparse')
+        n = graph.v_count
+
+        landmarks = []
+        forward = []
+        backward = []
+        closest = [INF] * n
+        candidate = first
+
+        while len(landmarks) < min(count, n):
+
+            landmarks.append(candidate)
+            forward.append(graph.dijkstra(candidate))
+            backward.append(reverse.dijkstra(candidate))
+
+            for v in range(n):
+                roundTrip = forward[-1][v] + backward[-1][v]
+                if roundTrip < closest[v]:
+                    closest[v] = roundTrip
+
+            best = -1
+            for v in graph.get_vertices():
+                if closest[v] != 0 and (best == -1 or closest[v] > closest[best]):
+                    best = v
+            if best == -1:
+                break
+            candidate = best
+
+        return cls(landmarks, forward, backward, graph.version, time.perf_counter() - start)
+
+    def heuristic(self, target: int):
+        """
+        This method returns a function giving a lower bound on the distance from a vertex to target. A bound of
+        infinity proves target cannot be reached from that vertex.
+        """
+
+        fromLandmark = [(table, table[target]) for table in self.forward]
+        toLandmark = [(table, table[target]) for table in self.backward]
+
+        def lower_bound(v):
+            bound = 0
+            for table, toTarget in fromLandmark:
+                toV = table[v]
+                if toV != INF and toTarget - toV > bound:
+                    bound = toTarget - toV
+            for table, fromTarget in toLandmark:
+                fromV = table[v]
+                if fromTarget != INF and fromV - fromTarget > bound:
+                    bound = fromV - fromTarget
+            return bound
+
+        return lower_bound
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Return the memory held by the distance tables.
+        """
+
+        return sum(table.itemsize * len(table) for table in self.forward + self.backward)
+
+    def stats(self) -> dict:
+        """
+        This method returns the landmarks, table memory and build time.
+        """
+
+        return {
+            'landmarks': list(self.landmarks),
+            'nbytes': self.nbytes,
+            'build_seconds': self.build_seconds,
+            'version': self.version,
+        }
@@ -0,0 +1,302 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: asyncio facade for DirectedGraph and UndirectedGraph
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import contextlib
+
+from graph_cache import _detach, _hashable
+
+# methods whose answer for (source, target) is a prefix of the full search from source, see _prefix()
+PREFIX_METHODS = ('dfs', 'bfs')
+
+
+def _prefix(order, target):
+    """
+    Cut a full dfs/bfs visit order down to what the search would have returned had it stopped at target.
+    """
+
+    if target is None:
+        return list(order)
+    try:
+        return order[:order.index(target) + 1]
+    except ValueError:
+        return list(order)
+
+
+class ReadWriteLock:
+    """
+    Class to let any number of readers or a single writer in at a time, for asyncio tasks
+    - a waiting writer stops new readers from entering, so writers are not starved by a steady stream of reads
+    """
+
+    def __init__(self):
+        self._condition = asyncio.Condition()
+        self._readers = 0
+        self._writing = False
+        self._waitingWriters = 0
+
+    @contextlib.asynccontextmanager
+    async def read(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: not self._writing and self._waitingWriters == 0)
+            self._readers += 1
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._readers -= 1
+                self._condition.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def write(self):
+        async with self._condition:
+            self._waitingWriters += 1
+            try:
+                await self._condition.wait_for(lambda: not self._writing and self._readers == 0)
+            finally:
+                self._waitingWriters -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            async with self._condition:
+                self._writing = False
+                self._condition.notify_all()
+
+
+class _Job:
+    """
+    Class to describe one computation waiting in the queue and everyone waiting for (part of) its result
+    - waiters holds (future, extract) pairs, where extract turns the computed result into that caller's answer
+    """
+
+    __slots__ = ('key', 'method', 'args', 'waiters', 'started')
+
+    def __init__(self, key, method, args):
+        self.key = key
+        self.method = method
+        self.args = args
+        self.waiters = []
+        self.started = False
+
+
+class AsyncGraph:
+    """
+    Class to serve queries on a DirectedGraph or UndirectedGraph from asyncio code without blocking the event loop
+    - every computation runs on an executor (a thread pool by default) while holding the read side of a
+      reader-writer lock, and every mutation runs on it holding the write side
+    - identical concurrent queries share one computation (coalescing)
+    - dfs/bfs queries from the same start with different targets, and distance() queries from the same source, share
+      one full search from that start (batching)
+    - at most max_pending computations wait in a bounded queue; callers submitting more wait for room (backpressure)
+    """
+
+    def __init__(self, graph, executor=None, max_pending=256, concurrency=4):
+        """
+        Wrap graph. executor defaults to a ThreadPoolExecutor with concurrency threads, which is shut down by
+        aclose(); a given executor is left running. concurrency is the number of computations run at the same time.
+        """
+        self.graph = graph
+        self.concurrency = concurrency
+        self.max_pending = max_pending
+        self._executor = executor if executor is not None else ThreadPoolExecutor(concurrency)
+        self._ownsExecutor = executor is None
+        self._lock = None
+        self._queue = None
+        self._workers = []
+        self._jobs = dict()
+        self.submitted = 0
+        self.computed = 0
+        self.coalesced = 0
+        self.batched = 0
+        self.writes = 0
+
+    async def __aenter__(self):
+        self._start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    def _start(self) -> None:
+        """
+        This method creates the lock, queue and worker tasks on the running event loop the first time they are needed.
+        """
+
+        if self._queue is not None:
+            return
+
+        self._lock = ReadWriteLock()
+        self._queue = asyncio.Queue(self.max_pending)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def aclose(self) -> None:
+        """
+        This method waits for the queued computations, stops the workers and shuts down the executor if it owns it.
+        """
+
+        if self._queue is not None:
+            await self._queue.join()
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            self._queue = None
+            self._workers = []
+
+        if self._ownsExecutor:
+            self._executor.shutdown(wait=True)
+
+    async def _worker(self) -> None:
+        """
+        This method takes jobs off the queue, runs each under the read lock on the executor and hands the result (or
+        the exception) to every waiter.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        while True:
+
+            job = await self._queue.get()
+            try:
+                async with self._lock.read():
+                    job.started = True
+                    if self._jobs.get(job.key) is job:
+                        del self._jobs[job.key]
+                    result = await loop.run_in_executor(self._executor, self._call, job.method, job.args)
+                    self.computed += 1
+
+            except Exception as error:
+                for future, _ in job.waiters:
+                    if not future.done():
+                        future.set_exception(error)
+
+            else:
+                for future, extract in job.waiters:
+                    if future.done():
+                        continue
+                    try:
+                        future.set_result(extract(result))
+                    except Exception as error:
+                        future.set_exception(error)
+
+            finally:
+                self._queue.task_done()
+
+    def _call(self, method, args):
+        return getattr(self.graph, method)(*args)
+
+    async def _submit(self, key, method, args, extract):
+        """
+        This method attaches the caller to the queued job for key if there is one that has not started yet, otherwise
+        queues a new job (waiting while the queue is full), and returns the caller's part of the result.
+        """
+
+        self._start()
+        self.submitted += 1
+        future = asyncio.get_running_loop().create_future()
+
+        job = self._jobs.get(key)
+        if job is not None and not job.started:
+            job.waiters.append((future, extract))
+            return await future
+
+        job = _Job(key, method, args)
+        job.waiters.append((future, extract))
+        self._jobs[key] = job
+
+        try:
+            await self._queue.put(job)
+        except BaseException:
+            # cancelled while waiting for room: hand the slot over to whoever joined in the meantime
+            job.waiters.remove((future, extract))
+            if len(job.waiters) > 0:
+                asyncio.ensure_future(self._queue.put(job))
+            elif self._jobs.get(key) is job:
+                del self._jobs[key]
+            raise
+
+        return await future
+
+    async def query(self, method: str, *args):
+        """
+        This method runs any read-only graph method, for example query('dijkstra', 0) or query('is_valid_path', path).
+        A request identical to one already queued waits for that computation instead of starting another, and gets its
+        own copy of the result. dfs and bfs are answered from the full search of their start vertex, shared by every
+        target.
+        """
+
+        if method in PREFIX_METHODS and len(args) in (1, 2):
+            target = args[1] if len(args) == 2 else None
+            key = (method, args[:1])
+            if key in self._jobs:
+                self.batched += 1
+            return await self._submit(key, method, args[:1], lambda order: _prefix(order, target))
+
+        key = (method, _hashable(args))
+        if key in self._jobs:
+            self.coalesced += 1
+        return await self._submit(key, method, args, _detach)
+
+    async def dfs(self, v_start, v_end=None) -> []:
+        return await self.query('dfs', v_start, v_end)
+
+    async def bfs(self, v_start, v_end=None) -> []:
+        return await self.query('bfs', v_start, v_end)
+
+    async def dijkstra(self, src) -> []:
+        return await self.query('dijkstra', src)
+
+    async def distance(self, src, dst):
+        """
+        This method returns the shortest distance from src to dst on a DirectedGraph. Requests from the same source
+        share one full dijkstra(src).
+        """
+
+        key = ('dijkstra', (src,))
+        if key in self._jobs:
+            self.batched += 1
+        return await self._submit(key, 'dijkstra', (src,), lambda distances: distances[dst])
+
+    async def mutate(self, method: str, *args):
+        """
+        This method runs a graph method that changes the graph (add_vertex, add_edge, remove_edge, remove_vertex, ...)
+        on the executor once every running query has finished, keeping new queries out until it is done.
+        """
+
+        self._start()
+
+        async with self._lock.write():
+            result = await asyncio.get_running_loop().run_in_executor(self._executor, self._call, method, args)
+            self.writes += 1
+
+        return result
+
+    async def add_vertex(self, *args):
+        return await self.mutate('add_vertex', *args)
+
+    async def add_edge(self, *args):
+        return await self.mutate('add_edge', *args)
+
+    async def remove_edge(self, *args):
+        return await self.mutate('remove_edge', *args)
+
+    async def remove_vertex(self, *args):
+        return await self.mutate('remove_vertex', *args)
+
+    def stats(self) -> dict:
+        """
+        This method returns how many requests were submitted, how many computations actually ran, how many requests
+        were coalesced or batched into another one, the writes applied and the current queue length.
+        """
+
+        return {
+            'submitted': self.submitted,
+            'computed': self.computed,
+            'coalesced': self.coalesced,
+            'batched': self.batched,
+            'writes': self.writes,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'max_pending': self.max_pending,
+        }
@@ -0,0 +1,408 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Batched graph mutations and the append-only delta log
+
+import json
+
+
+class DeltaLog:
+    """
+    Class to record the changes applied to a graph so they can be replayed on a replica
+    - every entry is a (sequence number, ops) pair, where ops is a list of operation tuples such as
+      ('add_edge', 0, 1, 5), ('remove_vertex', 'A') or ('add_vertices', 3), in the order they were applied
+    - entries are only ever appended; with a path every entry is also written to that file as one JSON line
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def append(self, ops) -> int:
+        """
+        This method appends one entry and returns its sequence number. Empty entries are not recorded.
+        """
+
+        if len(ops) == 0:
+            return len(self.entries) - 1
+
+        seq = len(self.entries)
+        self.entries.append((seq, [tuple(op) for op in ops]))
+
+        if self.path is not None:
+            with open(self.path, 'a') as logFile:
+                logFile.write(json.dumps({'seq': seq, 'ops': ops}) + '\n')
+
+        return seq
+
+    def replay(self, graph, start=0) -> int:
+        """
+        This method applies every entry from sequence number start onwards to graph, each one as a single batch, and
+        returns the sequence number to start from next time.
+        """
+
+        for seq, ops in self.entries[start:]:
+            if ops == [('compact',)]:
+                # renumbering is not buffered, it is always logged as an entry of its own
+                graph.compact()
+            else:
+                with graph.batch() as batch:
+                    for op in ops:
+                        getattr(batch, op[0])(*op[1:])
+            start = seq + 1
+
+        return start
+
+    @classmethod
+    def read(cls, path):
+        """
+        This method loads the entries of a log file written by a DeltaLog with a path. The returned log is not tied to
+        the file, so appending to it does not write there.
+        """
+
+        log = cls()
+        with open(path) as logFile:
+            for line in logFile:
+                if line.strip():
+                    record = json.loads(line)
+                    log.entries.append((record['seq'], [tuple(op) for op in record['ops']]))
+
+        return log
+
+
+class _Batch:
+    """
+    Class with the context manager protocol shared by both batch kinds
+    - leaving the with block normally commits, leaving it with an exception discards the buffered operations
+    - commit() undoes whatever it applied if applying fails part way, then re-raises
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.done = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.rollback()
+        return False
+
+    def _check_open(self) -> None:
+        if self.done:
+            raise RuntimeError('this batch was already committed or rolled back')
+
+    def rollback(self) -> None:
+        """
+        This method discards every buffered operation without touching the graph.
+        """
+
+        self.done = True
+
+    def commit(self) -> None:
+        """
+        This method applies the buffered operations to the graph in one pass, bumps the graph version once and
+        appends the applied operations to the graph's delta log as one entry.
+        """
+
+        self._check_open()
+        self.done = True
+
+        graph = self.graph
+        log = graph._delta_log
+        version = graph.version
+        applied = []
+        undo = []
+
+        # the graph methods used below must not log each operation on their own
+        graph._delta_log = None
+        try:
+            self._apply(applied, undo)
+        except BaseException:
+            for action in reversed(undo):
+                action()
+            graph.version = version + 1
+            raise
+        finally:
+            graph._delta_log = log
+
+        if len(applied) > 0:
+            graph.version = version + 1
+            if log is not None:
+                log.append(applied)
+
+    def _apply(self, applied, undo) -> None:
+        raise NotImplementedError
+
+
+class DirectedBatch(_Batch):
+    """
+    Class to buffer mutations of a DirectedGraph
+    - vertex additions and removals get their IDs right away (the ones add_vertex() would give them, reusing removed
+      IDs first) and are applied in order before the edges
+    - edge operations are reduced to the final weight of every touched edge (0 for removed), so repeated writes
+      collapse into one and an add cancelled by a remove disappears; edges that end up unchanged are skipped
+    - removing a vertex drops the pending edges at it
+    - the remaining edges are written with the storage engine's set_many()
+    """
+
+    def __init__(self, graph):
+        super().__init__(graph)
+        self.size = graph.v_count
+        self.free = list(graph._free)
+        self.tombstones = set(graph._tombstones)
+        self.vertex_ops = []
+        self.edges = dict()
+        self.new_vertex_id = None
+
+    def _has_vertex(self, v) -> bool:
+        return 0 <= v < self.size and v not in self.tombstones
+
+    def add_vertex(self) -> int:
+        """
+        This method reserves the ID of a new vertex, leaving it in new_vertex_id, and returns the number of vertices the
+        graph will have, like DirectedGraph.add_vertex().
+        """
+
+        self._check_open()
+        self.vertex_ops.append(('add_vertex',))
+        if len(self.free) > 0:
+            self.new_vertex_id = self.free.pop()
+            self.tombstones.discard(self.new_vertex_id)
+        else:
+            self.new_vertex_id = self.size
+            self.size += 1
+
+        return self.size - len(self.tombstones)
+
+    def add_vertices(self, n: int) -> int:
+        """
+        This method reserves n new vertex IDs at the end and returns the vertex count the graph will have.
+        """
+
+        self._check_open()
+        if n > 0:
+            self.vertex_ops.append(('add_vertices', n))
+            self.size += n
+        return self.size
+
+    def remove_vertex(self, v: int) -> None:
+        """
+        This method records the removal of v, dropping the pending operations on its edges.
+        """
+
+        self._check_open()
+        if not self._has_vertex(v):
+            return
+
+        for key in [key for key in self.edges if v in key]:
+            del self.edges[key]
+
+        self.tombstones.add(v)
+        self.free.append(v)
+        self.vertex_ops.append(('remove_vertex', v))
+
+    def add_edge(self, src: int, dst: int, weight=1) -> None:
+        """
+        This method records the edge with the same rules as DirectedGraph.add_edge(), counting reserved vertices.
+        """
+
+        self._check_open()
+        n = self.size
+        if src < 0 or src >= n or dst < 0 or dst >= n or weight < 0 or src == dst:
+            return
+        if src in self.tombstones or dst in self.tombstones:
+            return
+
+        self.edges[(src, dst)] = weight
+
+    def add_edges_from(self, edges) -> None:
+        for src, dst, weight in edges:
+            self.add_edge(src, dst, weight)
+
+    def remove_edge(self, src: int, dst: int) -> None:
+        """
+        This method records the removal of the edge, cancelling any add of it earlier in the batch.
+        """
+
+        self._check_open()
+        n = self.size
+        if src < 0 or src >= n or dst < 0 or dst >= n:
+            return
+        if src in self.tombstones or dst in self.tombstones:
+            return
+
+        self.edges[(src, dst)] = 0
+
+    def _apply(self, applied, undo) -> None:
+        graph = self.graph
+
+        for op in self.vertex_ops:
+
+            if op[0] == 'remove_vertex':
+                v = op[1]
+                edges = graph._incident_edges(v)
+
+                def restore(v=v, edges=edges):
+                    graph._tombstones.discard(v)
+                    graph._free.remove(v)
+                    graph.adj_matrix.set_many(edges)
+
+                graph.remove_vertex(v)
+                undo.append(restore)
+
+            elif op[0] == 'add_vertex' and len(graph._free) > 0:
+                v = graph._free[-1]
+
+                def unreuse(v=v):
+                    graph._tombstones.add(v)
+                    graph._free.append(v)
+
+                graph.add_vertex()
+                undo.append(unreuse)
+
+            else:
+                count = graph.v_count
+
+                def drop_vertices(count=count):
+                    graph.adj_matrix.truncate(count)
+                    graph.v_count = count
+
+                if op[0] == 'add_vertices':
+                    graph.add_vertices(op[1])
+                else:
+                    graph.add_vertex()
+                undo.append(drop_vertices)
+
+            applied.append(op)
+
+        storage = graph.adj_matrix
+        changes = []
+        previous = []
+        for (src, dst), weight in self.edges.items():
+            before = storage.get(src, dst)
+            if before != weight:
+                changes.append((src, dst, weight))
+                previous.append((src, dst, before))
+
+        undo.append(lambda: storage.set_many(previous))
+        storage.set_many(changes)
+
+        for src, dst, weight in changes:
+            applied.append(('add_edge', src, dst, weight) if weight else ('remove_edge', src, dst))
+
+
+class UndirectedBatch(_Batch):
+    """
+    Class to buffer mutations of an UndirectedGraph
+    - operations are reduced to: vertices removed during the batch, vertices (re)added after their last removal, and
+      the final state of every touched edge after the last removal of its ends, each kept in first-touched order
+    - removing a vertex cancels the pending edges at it and any pending add of it
+    - the result is applied as removals, then additions, then edge changes, which has the same effect as running
+      the operations one by one
+    """
+
+    def __init__(self, graph):
+        super().__init__(graph)
+        self.removed = dict()
+        self.added = dict()
+        self.edges = dict()
+        self.touching = dict()
+
+    def _exists(self, v) -> bool:
+        return v in self.added or (v in self.graph._ids and v not in self.removed)
+
+    def add_vertex(self, v: str) -> None:
+        self._check_open()
+        if not self._exists(v):
+            self.added[v] = None
+
+    def add_vertices(self, vertices) -> None:
+        for v in vertices:
+            self.add_vertex(v)
+
+    def add_edge(self, u: str, v: str) -> None:
+        """
+        This method records the edge with the same rules as UndirectedGraph.add_edge(), adding missing ends.
+        """
+
+        self._check_open()
+        if u == v:
+            return
+
+        self.add_vertex(u)
+        self.add_vertex(v)
+        self._set_edge(u, v, True)
+
+    def add_edges_from(self, edges) -> None:
+        for u, v in edges:
+            self.add_edge(u, v)
+
+    def remove_edge(self, v: str, u: str) -> None:
+        self._check_open()
+        if u != v and self._exists(u) and self._exists(v):
+            self._set_edge(u, v, False)
+
+    def remove_vertex(self, v: str) -> None:
+        """
+        This method records the removal of v, dropping the pending operations on its edges.
+        """
+
+        self._check_open()
+        if not self._exists(v):
+            return
+
+        for key in self.touching.pop(v, ()):
+            if self.edges.pop(key, None) is not None:
+                for end in key:
+                    if end != v:
+                        self.touching[end].discard(key)
+
+        if v in self.added:
+            del self.added[v]
+        if v in self.graph._ids:
+            self.removed[v] = None
+
+    def _set_edge(self, u, v, present) -> None:
+        key = (u, v) if (u, v) in self.edges or (v, u) not in self.edges else (v, u)
+        self.edges.pop(key, None)
+        self.edges[key] = present
+        self.touching.setdefault(u, set()).add(key)
+        self.touching.setdefault(v, set()).add(key)
+
+    def _apply(self, applied, undo) -> None:
+        graph = self.graph
+
+        for v in self.removed:
+            neighbors = list(graph.adj_list[v])
+
+            def restore(v=v, neighbors=neighbors):
+                graph.add_vertex(v)
+                for neighbor in neighbors:
+                    graph.add_edge(v, neighbor)
+
+            graph.remove_vertex(v)
+            undo.append(restore)
+            applied.append(('remove_vertex', v))
+
+        for v in self.added:
+            if v not in graph._ids:
+                graph.add_vertex(v)
+                undo.append(lambda v=v: graph.remove_vertex(v))
+                applied.append(('add_vertex', v))
+
+        for (u, v), present in self.edges.items():
+            adjacent = v in graph.adj_list[u]
+            if present and not adjacent:
+                graph.add_edge(u, v)
+                undo.append(lambda u=u, v=v: graph.remove_edge(u, v))
+                applied.append(('add_edge', u, v))
+            elif not present and adjacent:
+                graph.remove_edge(u, v)
+                undo.append(lambda u=u, v=v: graph.add_edge(u, v))
+                applied.append(('remove_edge', u, v))
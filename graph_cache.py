@@ -0,0 +1,158 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Versioned LRU cache for graph query results
+
+from collections import OrderedDict
+import functools
+import sys
+import threading
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, array results are only produced when it is installed
+    np = None
+
+
+class QueryCache:
+    """
+    Class to memoize graph query results
+    - entries are keyed by (method name, arguments)
+    - the whole cache is tied to one graph version, a different version drops every entry
+    - least recently used entries are evicted past max_entries or max_bytes
+    - the bookkeeping is done under lock so queries on several threads can share the cache; results are computed
+      outside it
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = None
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.lock = threading.Lock()
+
+    def clear(self) -> None:
+        """
+        This method drops every entry without touching the statistics.
+        """
+
+        self.entries.clear()
+        self.bytes = 0
+
+    def fetch(self, version, key, compute):
+        """
+        This method returns a copy of the cached result for key. If the graph version moved on since the entries were
+        stored, they are all dropped first. On a miss, compute() is called and its result is stored, evicting the least
+        recently used entries until the limits hold again.
+        """
+
+        with self.lock:
+
+            if version != self.version:
+                if len(self.entries) > 0:
+                    self.invalidations += 1
+                    self.clear()
+                self.version = version
+
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return _detach(self.entries[key][0])
+
+            self.misses += 1
+
+        result = compute()
+        size = _sizeof(result)
+
+        if self.max_bytes is not None and size > self.max_bytes:
+            return result
+
+        with self.lock:
+
+            if version != self.version or key in self.entries:
+                return result
+
+            self.entries[key] = (_detach(result), size)
+            self.bytes += size
+
+            while len(self.entries) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+                _, (_, evictedSize) = self.entries.popitem(last=False)
+                self.bytes -= evictedSize
+                self.evictions += 1
+
+        return result
+
+    def stats(self) -> dict:
+        """
+        This method returns the hit, miss, eviction and invalidation counters along with the current size.
+        """
+
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+        }
+
+
+def cached_query(method):
+    """
+    Decorator for read-only graph methods. When the graph has a QueryCache in self._cache, results are looked up by
+    (method name, arguments) at the current self.version; otherwise the method is called directly.
+    """
+
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+
+        cache = self._cache
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        key = (name, _hashable(args), _hashable(sorted(kwargs.items())))
+        return cache.fetch(self.version, key, lambda: method(self, *args, **kwargs))
+
+    return wrapper
+
+
+def _hashable(value):
+    """
+    Turn lists (for example multi-source arguments) into tuples so they can be part of a cache key.
+    """
+
+    if isinstance(value, (list, tuple)):
+        return tuple(_hashable(item) for item in value)
+    return value
+
+
+def _detach(value):
+    """
+    Copy list, tuple and NumPy array results so callers cannot change what the cache holds.
+    """
+
+    if np is not None and isinstance(value, np.ndarray):
+        return value.copy()
+    if isinstance(value, list):
+        return [_detach(item) if isinstance(item, (list, tuple)) else item for item in value]
+    if isinstance(value, tuple):
+        return tuple(_detach(item) for item in value)
+    return value
+
+
+def _sizeof(value) -> int:
+    """
+    Estimate the memory held by a result, counting nested lists and tuples and the scalars inside them.
+    """
+
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_sizeof(item) for item in value)
+    return sys.getsizeof(value)
@@ -0,0 +1,275 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Edge list readers and the binary snapshot format
+
+from array import array
+import contextlib
+import mmap
+import os
+import struct
+import tempfile
+
+from d_storage import CSRAdjacency, DenseMatrix
+
+# Snapshot layout: a HEADER followed by sections of native byte order arrays, each padded to 8 bytes
+#   dense:      size * size weight cells, float cells (floats, 'q', src * size + dst)
+#   csr:        offsets (size + 1, 'q'), targets (edges, 'q'), weights (edges, typecode), float edges (floats, 'q')
+#   undirected: name lengths (size, 'q'), UTF-8 name bytes (names bytes), offsets (size + 1, 'q'),
+#               targets (edges, typecode)
+# the float sections list the whole weights of a 'd' snapshot that were floats (2.0) in the saved graph, every other
+# whole weight is loaded as an int
+MAGIC = b'GADT'
+FORMAT_VERSION = 2
+KIND_DENSE = 0
+KIND_CSR = 1
+KIND_UNDIRECTED = 2
+HEADER = struct.Struct('<4sHBcQQQQ')
+
+
+def _delimiter_for(path, delimiter):
+    """
+    Pick the field delimiter: ',' for .csv files, otherwise any whitespace (TSV and space separated files).
+    """
+
+    if delimiter is None and str(path).lower().endswith('.csv'):
+        return ','
+    return delimiter
+
+
+def _parse_weight(field):
+    """
+    Parse an edge weight, keeping integer weights as ints.
+    """
+
+    try:
+        return int(field)
+    except ValueError:
+        return float(field)
+
+
+def read_line_chunks(path, delimiter=None, header=False, chunk_lines=100000):
+    """
+    Yield the split lines of an edge list file, reading about chunk_lines lines at a time. Each chunk is a generator,
+    so a split line can be dropped as soon as it has been used. Blank lines and lines starting with '#' are skipped,
+    as is the first line when header is True.
+    """
+
+    delimiter = _delimiter_for(path, delimiter)
+
+    with open(path) as edgeFile:
+
+        if header:
+            edgeFile.readline()
+
+        while True:
+
+            lines = edgeFile.readlines(chunk_lines * 16)
+            if len(lines) == 0:
+                return
+
+            yield (line.split(delimiter) for line in lines if line.strip() and not line.startswith('#'))
+
+
+def read_weighted_edges(path, delimiter=None, header=False, chunk_lines=100000):
+    """
+    Yield lists of (src, dst, weight) tuples from a 'src dst [weight]' file with integer vertices. A missing weight
+    column means a weight of 1.
+    """
+
+    for rows in read_line_chunks(path, delimiter, header, chunk_lines):
+
+        chunk = []
+        for fields in rows:
+            if len(fields) > 2:
+                chunk.append((int(fields[0]), int(fields[1]), _parse_weight(fields[2])))
+            else:
+                chunk.append((int(fields[0]), int(fields[1]), 1))
+
+        yield chunk
+
+
+def read_edges(path, delimiter=None, header=False, chunk_lines=100000):
+    """
+    Yield chunks of (u, v) name tuples from a 'u v' file, each chunk a generator. Extra columns are ignored.
+    """
+
+    if _delimiter_for(path, delimiter) is None:
+        # whitespace splitting leaves nothing to strip
+        for rows in read_line_chunks(path, delimiter, header, chunk_lines):
+            yield ((fields[0], fields[1]) for fields in rows)
+    else:
+        for rows in read_line_chunks(path, delimiter, header, chunk_lines):
+            yield ((fields[0].strip(), fields[1].strip()) for fields in rows)
+
+
+def _write_section(snapshot, data) -> None:
+    """
+    Write one buffer and pad it to a multiple of 8 bytes.
+    """
+
+    raw = memoryview(data).cast('B')
+    snapshot.write(raw)
+    snapshot.write(bytes(-len(raw) % 8))
+
+
+@contextlib.contextmanager
+def _replacing(path):
+    """
+    Open a temporary file next to path for writing and move it over path once the block finishes. A snapshot that is
+    memory-mapped by a loaded graph is never rewritten in place: the mapping keeps the old file, and a failed write
+    leaves path as it was.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temporary = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+
+    try:
+        with os.fdopen(handle, 'wb') as snapshot:
+            yield snapshot
+        if os.path.exists(path):
+            os.chmod(temporary, os.stat(path).st_mode & 0o777)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(temporary, 0o666 & ~umask)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def _read_section(buffer, offset, typecode, count):
+    """
+    Return a (memoryview of count typecode items, next section offset) tuple over buffer without copying.
+    """
+
+    itemsize = array(typecode).itemsize
+    end = offset + count * itemsize
+    if end > len(buffer):
+        raise ValueError('graph snapshot is truncated')
+
+    return buffer[offset:end].cast(typecode), end + (-end % 8)
+
+
+def _open_snapshot(path, use_mmap):
+    """
+    Map (or read) a snapshot file and check its header. Mapped files use copy-on-write access, so the pages are
+    shared between processes until someone writes to them. Returns (buffer, kind, typecode, size, edges, name bytes,
+    floats).
+    """
+
+    with open(path, 'rb') as snapshot:
+        if use_mmap:
+            raw = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_COPY)
+        else:
+            raw = bytearray(snapshot.read())
+
+    buffer = memoryview(raw)
+    if len(buffer) < HEADER.size:
+        raise ValueError('graph snapshot is truncated')
+
+    magic, version, kind, typecode, size, edges, nameBytes, floats = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f'{path} is not a graph snapshot')
+    if version != FORMAT_VERSION:
+        raise ValueError(f'unsupported graph snapshot version {version}, expected {FORMAT_VERSION}')
+
+    return buffer, kind, typecode.decode(), size, edges, nameBytes, floats
+
+
+def write_directed_snapshot(path, storage) -> None:
+    """
+    Save a directed graph's storage engine. DenseMatrix storage is written as a size x size matrix without the spare
+    capacity, every other engine as CSR arrays, each followed by the positions of its float weights so ints and floats
+    load back as they were saved. The file is replaced atomically, see _replacing().
+    """
+
+    with _replacing(path) as snapshot:
+
+        if isinstance(storage, DenseMatrix):
+            size = storage.size
+            floats = array('q', sorted(src * size + dst for src, dst in storage.floats))
+            snapshot.write(HEADER.pack(MAGIC, FORMAT_VERSION, KIND_DENSE, storage.typecode.encode(),
+                                       size, size * size, 0, len(floats)))
+            cells = memoryview(storage.data)
+            for i in range(size):
+                start = i * storage.capacity
+                snapshot.write(cells[start:start + size].cast('B'))
+            snapshot.write(bytes(-size * size * cells.itemsize % 8))
+            _write_section(snapshot, floats)
+            return
+
+        csr = CSRAdjacency.from_storage(storage)
+        floats = array('q', sorted(csr.floats))
+        snapshot.write(HEADER.pack(MAGIC, FORMAT_VERSION, KIND_CSR, csr.typecode.encode(),
+                                   csr.size, len(csr.targets), 0, len(floats)))
+        _write_section(snapshot, csr.offsets)
+        _write_section(snapshot, csr.targets)
+        _write_section(snapshot, csr.weights)
+        _write_section(snapshot, floats)
+
+
+def read_directed_snapshot(path, use_mmap=True):
+    """
+    Load a directed graph snapshot and return a storage engine that reads straight from the file's pages: a
+    DenseMatrix or CSRAdjacency over memoryviews. Nothing is copied until the graph is changed.
+    """
+
+    buffer, kind, typecode, size, edges, _, floatCount = _open_snapshot(path, use_mmap)
+
+    if kind == KIND_DENSE:
+        cells, offset = _read_section(buffer, HEADER.size, typecode, size * size)
+        floats, _ = _read_section(buffer, offset, 'q', floatCount)
+        return DenseMatrix.from_buffer(cells, size, (divmod(cell, size) for cell in floats))
+
+    if kind == KIND_CSR:
+        offsets, offset = _read_section(buffer, HEADER.size, 'q', size + 1)
+        targets, offset = _read_section(buffer, offset, 'q', edges)
+        weights, offset = _read_section(buffer, offset, typecode, edges)
+        floats, _ = _read_section(buffer, offset, 'q', floatCount)
+        return CSRAdjacency(offsets, targets, weights, floats)
+
+    raise ValueError(f'{path} does not hold a directed graph')
+
+
+def write_undirected_snapshot(path, names, offsets, targets) -> None:
+    """
+    Save an undirected graph given its vertex names and the CSR arrays of its neighbor IDs (both directions). The
+    targets are written with their own typecode. The file is replaced atomically, see _replacing().
+    """
+
+    encoded = [str(name).encode('utf-8') for name in names]
+    lengths = array('q', [len(name) for name in encoded])
+    blob = b''.join(encoded)
+
+    with _replacing(path) as snapshot:
+        snapshot.write(HEADER.pack(MAGIC, FORMAT_VERSION, KIND_UNDIRECTED, targets.typecode.encode(), len(names),
+                                   len(targets), len(blob), 0))
+        _write_section(snapshot, lengths)
+        _write_section(snapshot, blob)
+        _write_section(snapshot, offsets)
+        _write_section(snapshot, targets)
+
+
+def read_undirected_snapshot(path, use_mmap=True):
+    """
+    Load an undirected graph snapshot and return (names, offsets, targets), where the arrays are memoryviews over
+    the file.
+    """
+
+    buffer, kind, typecode, size, edges, nameBytes, _ = _open_snapshot(path, use_mmap)
+    if kind != KIND_UNDIRECTED:
+        raise ValueError(f'{path} does not hold an undirected graph')
+
+    lengths, offset = _read_section(buffer, HEADER.size, 'q', size)
+    blob, offset = _read_section(buffer, offset, 'B', nameBytes)
+    offsets, offset = _read_section(buffer, offset, 'q', size + 1)
+    targets, _ = _read_section(buffer, offset, typecode, edges)
+
+    names = []
+    position = 0
+    for length in lengths:
+        names.append(bytes(blob[position:position + length]).decode('utf-8'))
+        position += length
+
+    return names, offsets, targets
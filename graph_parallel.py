@@ -0,0 +1,125 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Multi-source directed graph queries on a process pool over shared memory
+
+from array import array
+import multiprocessing
+from multiprocessing import shared_memory
+
+from d_storage import CSRAdjacency, DenseMatrix
+
+# set in every worker process by _attach()
+_worker_graph = None
+_worker_memory = None
+
+
+def _layout(storage):
+    """
+    Return (kind, [(typecode, count, chunks), ...]) describing the arrays to place in shared memory, where chunks
+    yields the raw bytes of the array piece by piece: the compact size x size matrix (row by row) for DenseMatrix
+    storage, CSR offsets/targets/weights for anything else, followed by the positions of the float weights (the cells
+    src * size + dst, or the edge positions) as in a snapshot.
+    """
+
+    if isinstance(storage, DenseMatrix):
+        size = storage.size
+        cells = memoryview(storage.data)
+        rows = (cells[i * storage.capacity:i * storage.capacity + size].cast('B') for i in range(size))
+        floats = array('q', sorted(src * size + dst for src, dst in storage.floats))
+        return 'dense', [(storage.typecode, size * size, rows), ('q', len(floats), [memoryview(floats).cast('B')])]
+
+    csr = CSRAdjacency.from_storage(storage)
+    floats = array('q', sorted(csr.floats))
+    return 'csr', [(typecode, len(data), [memoryview(data).cast('B')])
+                   for typecode, data in (('q', csr.offsets), ('q', csr.targets), (csr.typecode, csr.weights),
+                                          ('q', floats))]
+
+
+def _share(storage):
+    """
+    Copy a storage engine into one shared memory block, each array aligned to 8 bytes. Returns the block and the
+    (kind, size, [(typecode, count, offset), ...]) description workers need to attach to it.
+    """
+
+    kind, sections = _layout(storage)
+
+    placed = []
+    total = 0
+    for typecode, count, _ in sections:
+        placed.append((typecode, count, total))
+        total += count * array(typecode).itemsize
+        total += -total % 8
+
+    memory = shared_memory.SharedMemory(create=True, size=max(total, 1))
+    for (_, _, chunks), (_, _, offset) in zip(sections, placed):
+        for chunk in chunks:
+            memory.buf[offset:offset + len(chunk)] = chunk
+            offset += len(chunk)
+
+    return memory, (kind, len(storage), placed)
+
+
+def _attach(graph_class, name, description, tombstones=()) -> None:
+    """
+    Pool initializer: attach to the shared block and build a read-only graph whose storage reads straight from it.
+    The pool's workers share the parent's resource tracker, so the block is only unlinked once, by run_many().
+    """
+
+    global _worker_graph, _worker_memory
+
+    _worker_memory = shared_memory.SharedMemory(name=name)
+
+    kind, size, placed = description
+    views = [_worker_memory.buf[offset:offset + count * array(typecode).itemsize].cast(typecode)
+             for typecode, count, offset in placed]
+
+    if kind == 'dense':
+        storage = DenseMatrix.from_buffer(views[0], size, (divmod(cell, size) for cell in views[1]))
+    else:
+        storage = CSRAdjacency(*views)
+
+    _worker_graph = graph_class(storage=storage)
+    _worker_graph.v_count = size
+    _worker_graph._tombstones = set(tombstones)
+
+
+def _run_dijkstra(src):
+    return src, _worker_graph.dijkstra(src)
+
+
+def _run_bfs(src):
+    return src, _worker_graph.bfs(src)
+
+
+def run_many(graph, task, sources, workers=None, chunksize=8):
+    """
+    Yield (source, result) tuples for every source as soon as they are completed by a pool of worker processes.
+    The graph's storage is copied into shared memory once, so no task pickles the adjacency. The block is released
+    when the generator finishes or is closed.
+    """
+
+    memory, description = _share(graph.adj_matrix)
+
+    try:
+        with multiprocessing.Pool(workers, _attach, (type(graph), memory.name, description, graph._tombstones)) as pool:
+            for result in pool.imap_unordered(task, sources, chunksize):
+                yield result
+    finally:
+        memory.close()
+        memory.unlink()
+
+
+def dijkstra_many(graph, sources, workers=None, chunksize=8):
+    """
+    Yield (source, distances) for every source in completion order, computed with dijkstra() in worker processes.
+    """
+
+    return run_many(graph, _run_dijkstra, sources, workers, chunksize)
+
+
+def bfs_many(graph, sources, workers=None, chunksize=8):
+    """
+    Yield (source, visit order) for every source in completion order, computed with bfs() in worker processes.
+    """
+
+    return run_many(graph, _run_bfs, sources, workers, chunksize)
@@ -0,0 +1,252 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Reachability index for directed graphs
+
+from array import array
+import random
+import sys
+import threading
+import time
+
+# condensations with more components than this get interval labels instead of transitive closure bitsets
+CLOSURE_LIMIT = 20000
+
+
+class ReachabilityIndex:
+    """
+    Class to answer "is there a path from u to v" without traversing the graph
+    - built on the graph's condensation, so every strongly connected component is answered in O(1)
+    - 'closure': one bitset of reachable components per component, O(1) queries and about C * C / 8 bytes
+    - 'interval': a few random depth first search interval labels per component (GRAIL); a label that does not
+      contain the target's proves it is unreachable, otherwise a search of the condensation pruned by the labels
+      and the topological numbering decides
+    - the index is tied to a graph version; added edges that create no new reachability keep it valid, any other
+      change leaves it stale until rebuild()
+    - queries hold lock while they check, rebuild and read the index, so threads querying a stale index at once
+      (as under AsyncGraph) never read bitsets or labels half way through a rebuild
+    """
+
+    def __init__(self, condensation, method='auto', labels=3, seed=0):
+        """
+        Build the index from a Condensation. method is 'closure', 'interval' or 'auto' (closure up to CLOSURE_LIMIT
+        components). labels is the number of interval labels per component for the interval method.
+        """
+        if method == 'auto':
+            method = 'closure' if condensation.count <= CLOSURE_LIMIT else 'interval'
+        if method not in ('closure', 'interval'):
+            raise ValueError(f"unknown reachability index method {method!r}, expected 'closure' or 'interval'")
+
+        self.method = method
+        self.labels = labels
+        self.seed = seed
+        self.version = None
+        self.build_seconds = 0.0
+        self.rebuilds = 0
+        self.incremental_updates = 0
+        self._condensation = None
+        self._bits = None
+        self._low = None
+        self._rank = None
+        self.lock = threading.Lock()
+
+        self.rebuild(condensation)
+
+    def rebuild(self, condensation) -> None:
+        """
+        This method recomputes the index from a fresh Condensation and records how long that took. The new bitsets or
+        labels are built aside and swapped in together, with the version set last.
+        """
+
+        start = time.perf_counter()
+
+        if self.method == 'closure':
+            bits, low, rank = self._build_closure(condensation), None, None
+        else:
+            bits, (low, rank) = None, self._build_intervals(condensation)
+
+        self._condensation = condensation
+        self._bits = bits
+        self._low = low
+        self._rank = rank
+        self.version = condensation.version
+
+        self.build_seconds = time.perf_counter() - start
+        self.rebuilds += 1
+
+    def _build_closure(self, condensed) -> []:
+        """
+        This method returns the reachable-component bitsets, built in one pass over the components in reverse
+        topological order by OR-ing in the bitsets of the successors.
+        """
+
+        bits = [0] * condensed.count
+
+        for c in range(condensed.count - 1, -1, -1):
+            reach = 1 << c
+            for target in condensed.successors[c]:
+                reach |= bits[target]
+            bits[c] = reach
+
+        return bits
+
+    def _build_intervals(self, condensed) -> tuple:
+        """
+        This method runs labels iterative depth first searches of the condensation, each visiting roots and children in
+        a different random order. Every search numbers components in postorder (rank) and records the lowest rank
+        among each component's descendants (low), so a component reachable from c always has [low, rank] inside c's.
+        Returns the (low, rank) lists with one label array per search.
+        """
+
+        generator = random.Random(self.seed)
+        lows = []
+        ranks = []
+
+        for _ in range(self.labels):
+
+            low = [0] * condensed.count
+            rank = [0] * condensed.count
+            visited = bytearray(condensed.count)
+            counter = 0
+
+            roots = list(range(condensed.count))
+            generator.shuffle(roots)
+
+            for root in roots:
+
+                if visited[root]:
+                    continue
+
+                visited[root] = 1
+                stack1 = [(root, iter(generator.sample(condensed.successors[root], len(condensed.successors[root]))))]
+                low[root] = condensed.count
+
+                while len(stack1) > 0:
+
+                    curr, children = stack1[-1]
+
+                    for child in children:
+                        if not visited[child]:
+                            visited[child] = 1
+                            low[child] = condensed.count
+                            stack1.append((child, iter(generator.sample(condensed.successors[child],
+                                                                        len(condensed.successors[child])))))
+                            break
+                        low[curr] = min(low[curr], low[child])
+
+                    else:
+                        rank[curr] = counter
+                        low[curr] = min(low[curr], counter)
+                        counter += 1
+                        stack1.pop()
+                        if len(stack1) > 0:
+                            parent = stack1[-1][0]
+                            low[parent] = min(low[parent], low[curr])
+
+            lows.append(array('l', low))
+            ranks.append(array('l', rank))
+
+        return lows, ranks
+
+    def is_current(self, version) -> bool:
+        """
+        This method returns True if the index still describes the graph at the given version.
+        """
+
+        return self.version == version
+
+    def edge_added(self, src: int, dst: int, old_version, new_version) -> None:
+        """
+        This method keeps the index valid across add_edge(src, dst) when it can: if dst was already reachable from src
+        nothing changes, and a closure index absorbs an edge that joins no components by OR-ing dst's bitset into every
+        component that reaches src. Otherwise the index is left stale.
+        """
+
+        if self.version != old_version:
+            return
+
+        if self.reachable(src, dst):
+            self.version = new_version
+            return
+
+        if self.method == 'closure':
+            component = self._condensation.component
+            a, b = component[src], component[dst]
+            if (self._bits[b] >> a) & 1:
+                return
+
+            bits = self._bits
+            added = bits[b]
+            for c in range(len(bits)):
+                if (bits[c] >> a) & 1:
+                    bits[c] |= added
+
+            self.version = new_version
+            self.incremental_updates += 1
+
+    def reachable(self, u: int, v: int) -> bool:
+        """
+        This method returns True if there is a path from u to v (every vertex reaches itself).
+        """
+
+        condensed = self._condensation
+        a, b = condensed.component[u], condensed.component[v]
+
+        if a == b:
+            return True
+
+        if self.method == 'closure':
+            return (self._bits[a] >> b) & 1 == 1
+
+        if a > b or not self._contains(a, b):
+            return False
+
+        # the labels could not rule it out, search the condensation skipping components that cannot lead to b
+        seen = {a}
+        stack1 = [a]
+        while len(stack1) > 0:
+            curr = stack1.pop()
+            for child in condensed.successors[curr]:
+                if child == b:
+                    return True
+                if child not in seen and child < b and self._contains(child, b):
+                    seen.add(child)
+                    stack1.append(child)
+
+        return False
+
+    def _contains(self, a: int, b: int) -> bool:
+        """
+        This method returns True if every interval label of component a contains the matching label of component b.
+        """
+
+        for low, rank in zip(self._low, self._rank):
+            if low[b] < low[a] or rank[b] > rank[a]:
+                return False
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Return the memory held by the index itself (bitsets or labels), not counting the shared condensation.
+        """
+
+        if self.method == 'closure':
+            return sys.getsizeof(self._bits) + sum(sys.getsizeof(bits) for bits in self._bits)
+
+        return sum(label.itemsize * len(label) for label in self._low + self._rank)
+
+    def stats(self) -> dict:
+        """
+        This method returns the method, size, build time and maintenance counters of the index.
+        """
+
+        return {
+            'method': self.method,
+            'components': self._condensation.count,
+            'vertices': len(self._condensation.component),
+            'nbytes': self.nbytes,
+            'build_seconds': self.build_seconds,
+            'rebuilds': self.rebuilds,
+            'incremental_updates': self.incremental_updates,
+            'version': self.version,
+        }
@@ -0,0 +1,158 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Strongly connected components and the condensation of a directed graph
+
+from array import array
+
+
+def strongly_connected_components(v_count: int, neighbors) -> []:
+    """
+    Run Tarjan's algorithm over vertices 0 .. v_count - 1, where neighbors(v) returns the (dst, weight) pairs leaving v.
+    The depth first search keeps its own stack of (vertex, remaining children) pairs instead of recursing. Returns the
+    components as lists of vertices (ascending), sink components first, which is reverse topological order.
+    """
+
+    unvisited = -1
+    index = array('l', [unvisited]) * v_count
+    lowlink = array('l', [0]) * v_count
+    onStack = bytearray(v_count)
+    tarjanStack = []
+    components = []
+    counter = 0
+
+    for root in range(v_count):
+
+        if index[root] != unvisited:
+            continue
+
+        index[root] = lowlink[root] = counter
+        counter += 1
+        tarjanStack.append(root)
+        onStack[root] = 1
+        stack1 = [(root, iter(neighbors(root)))]
+
+        while len(stack1) > 0:
+
+            curr, children = stack1[-1]
+
+            for child, _ in children:
+
+                if index[child] == unvisited:
+                    index[child] = lowlink[child] = counter
+                    counter += 1
+                    tarjanStack.append(child)
+                    onStack[child] = 1
+                    stack1.append((child, iter(neighbors(child))))
+                    break
+
+                if onStack[child] and index[child] < lowlink[curr]:
+                    lowlink[curr] = index[child]
+
+            else:
+                stack1.pop()
+
+                if len(stack1) > 0:
+                    parent = stack1[-1][0]
+                    if lowlink[curr] < lowlink[parent]:
+                        lowlink[parent] = lowlink[curr]
+
+                if lowlink[curr] == index[curr]:
+                    members = []
+                    while True:
+                        vertex = tarjanStack.pop()
+                        onStack[vertex] = 0
+                        members.append(vertex)
+                        if vertex == curr:
+                            break
+                    members.sort()
+                    components.append(members)
+
+    return components
+
+
+class Condensation:
+    """
+    Class to hold the condensation of a directed graph: one node per strongly connected component
+    - components are numbered in topological order, so every condensation edge goes from a lower to a higher ID
+    - component[v] is the component ID of vertex v and members[c] the vertices of component c
+    - successors[c] / predecessors[c] list the neighboring components in ascending order
+    - reachability between components is answered from bitsets built on first use
+    """
+
+    def __init__(self, v_count: int, neighbors, version=None):
+        """
+        Build the condensation of the graph given by v_count and neighbors(v) (see strongly_connected_components).
+        version is the graph version the condensation was built from.
+        """
+        self.version = version
+        self.members = strongly_connected_components(v_count, neighbors)
+        self.members.reverse()
+        self.count = len(self.members)
+
+        self.component = array('l', [0]) * v_count
+        for c, members in enumerate(self.members):
+            for vertex in members:
+                self.component[vertex] = c
+
+        successors = [set() for _ in range(self.count)]
+        for v in range(v_count):
+            c = self.component[v]
+            for dst, _ in neighbors(v):
+                if self.component[dst] != c:
+                    successors[c].add(self.component[dst])
+
+        self.successors = [sorted(targets) for targets in successors]
+        self.predecessors = [[] for _ in range(self.count)]
+        for c, targets in enumerate(self.successors):
+            for target in targets:
+                self.predecessors[target].append(c)
+
+        self._closure = None
+
+    def __len__(self):
+        return self.count
+
+    def topological_order(self) -> []:
+        """
+        This method returns the component IDs in topological order, which is simply ascending ID order.
+        """
+
+        return list(range(self.count))
+
+    def is_cyclic(self, c: int) -> bool:
+        """
+        This method returns True if component c contains a cycle, which for a graph without loops means it has more
+        than one vertex.
+        """
+
+        return len(self.members[c]) > 1
+
+    def reaches(self, a: int, b: int) -> bool:
+        """
+        This method returns True if component b can be reached from component a. Since IDs are topological, a > b is
+        answered right away; otherwise the reachability bitsets are built once (a single pass over the condensation
+        in reverse topological order) and looked up.
+        """
+
+        if a == b:
+            return True
+        if a > b:
+            return False
+
+        return (self._reach_bits()[a] >> b) & 1 == 1
+
+    def _reach_bits(self) -> []:
+        """
+        This method returns, for every component, an integer whose bit c is set when component c is reachable from it.
+        """
+
+        if self._closure is None:
+            closure = [0] * self.count
+            for c in range(self.count - 1, -1, -1):
+                bits = 1 << c
+                for target in self.successors[c]:
+                    bits |= closure[target]
+                closure[c] = bits
+            self._closure = closure
+
+        return self._closure
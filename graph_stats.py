@@ -0,0 +1,83 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Opt-in counters for graph traversal calls
+
+import time
+
+
+class TraversalStats:
+    """
+    Class to hold the counters of one traversal call
+    - vertices_expanded: vertices visited (or settled, for dijkstra) and whose edges were scanned
+    - edges_relaxed: edges looked at while expanding those vertices
+    - pushes / pops: operations on the heap, stack or queue driving the search
+    - max_frontier: largest size the heap, stack or queue reached
+    - wall_time: seconds from the start of the call until it finished (for generators, until they were exhausted or
+      closed, so it includes the consumer's time)
+    """
+
+    __slots__ = ('method', 'vertices_expanded', 'edges_relaxed', 'pushes', 'pops', 'max_frontier', 'wall_time',
+                 '_started')
+
+    def __init__(self, method: str):
+        self.method = method
+        self.vertices_expanded = 0
+        self.edges_relaxed = 0
+        self.pushes = 0
+        self.pops = 0
+        self.max_frontier = 0
+        self.wall_time = 0.0
+        self._started = time.perf_counter()
+
+    def __repr__(self):
+        fields = ', '.join(f'{key}={value}' for key, value in self.as_dict().items())
+        return f'TraversalStats({fields})'
+
+    def as_dict(self) -> dict:
+        """
+        This method returns the counters as a plain dictionary, ready to be shipped to a metrics system.
+        """
+
+        return {name: getattr(self, name) for name in self.__slots__ if not name.startswith('_')}
+
+
+class Instrumentation:
+    """
+    Class to collect TraversalStats for one graph
+    - graphs only create stats while an Instrumentation is attached, otherwise the hot loops skip all counting
+    - the latest stats per method and running totals are kept, and every finished call is passed to callback
+    """
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.last = dict()
+        self.calls = dict()
+        self.totals = dict()
+
+    def begin(self, method: str) -> TraversalStats:
+        """
+        This method starts the counters for one call of method.
+        """
+
+        return TraversalStats(method)
+
+    def end(self, stats: TraversalStats) -> None:
+        """
+        This method stops the clock of a call, records it and hands it to the callback.
+        """
+
+        stats.wall_time = time.perf_counter() - stats._started
+        self.last[stats.method] = stats
+        self.calls[stats.method] = self.calls.get(stats.method, 0) + 1
+
+        totals = self.totals.setdefault(stats.method, dict())
+        for key, value in stats.as_dict().items():
+            if key == 'method':
+                continue
+            if key == 'max_frontier':
+                totals[key] = max(totals.get(key, 0), value)
+            else:
+                totals[key] = totals.get(key, 0) + value
+
+        if self.callback is not None:
+            self.callback(stats)
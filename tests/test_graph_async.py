@@ -0,0 +1,54 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Concurrency tests for the asyncio graph facade
+
+import asyncio
+import sys
+import unittest
+
+from graph_async import AsyncGraph
+from ud_graph import UndirectedGraph
+
+
+class ConcurrentComponentQueriesTest(unittest.TestCase):
+    """
+    Component queries rebuild the graph's component index on first use after a removal, while other queries run on
+    the facade's other threads under the same read lock.
+    """
+
+    def setUp(self):
+        self.switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switchInterval)
+
+    def test_component_queries_agree(self):
+        n = 20000
+        names = [str(v) for v in range(n)]
+
+        for _ in range(5):
+
+            graph = UndirectedGraph()
+            graph.add_edges_from(zip(names, names[1:]))
+            graph.remove_edge(names[n // 2], names[n // 2 + 1])
+
+            async def run():
+                async with AsyncGraph(graph, concurrency=4) as facade:
+                    queries = [facade.query('count_connected_components')]
+                    for v in range(0, n, n // 8):
+                        queries.append(facade.query('connected', names[0], names[v]))
+                        queries.append(facade.query('component_of', names[v]))
+                    return await asyncio.gather(*queries)
+
+            count, *answers = asyncio.run(run())
+            connected = answers[0::2]
+            representatives = answers[1::2]
+
+            self.assertEqual(count, 2)
+            self.assertEqual(connected, [v <= n // 2 for v in range(0, n, n // 8)])
+            self.assertEqual(len(set(representatives)), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
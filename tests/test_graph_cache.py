@@ -0,0 +1,91 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Thread-safety tests for the query result cache
+
+import sys
+import threading
+import unittest
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from d_graph import DirectedGraph
+
+
+class ConcurrentCacheTest(unittest.TestCase):
+    """
+    Several threads querying one cached graph, as AsyncGraph's thread pool does.
+    """
+
+    def setUp(self):
+        self.switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switchInterval)
+
+    def test_bookkeeping_stays_consistent(self):
+        n = 50
+        graph = DirectedGraph(storage='sparse')
+        graph.add_vertices(n)
+        graph.add_edges_from([(v, (v + 1) % n, 1) for v in range(n)])
+        expected = {v: graph.bfs(v) for v in range(5)}
+        graph.enable_cache(max_entries=4)
+        errors = []
+
+        def work(k):
+            try:
+                for i in range(5000):
+                    self.assertTrue(graph.is_valid_path([i * k % n]))
+                    self.assertEqual(graph.bfs((i + k) % 5), expected[(i + k) % 5])
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=work, args=(k,)) for k in range(1, 5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        cache = graph._cache
+        self.assertEqual(errors, [])
+        self.assertLessEqual(len(cache.entries), 4)
+        self.assertEqual(cache.bytes, sum(size for _, size in cache.entries.values()))
+
+
+class CachedResultCopyTest(unittest.TestCase):
+    """
+    Callers get copies of cached results, so changing one does not change later answers.
+    """
+
+    def make_graph(self):
+        graph = DirectedGraph(storage='sparse')
+        graph.add_vertices(3)
+        graph.add_edges_from([(0, 1, 2), (1, 2, 3)])
+        graph.enable_cache()
+        return graph
+
+    def test_list_results(self):
+        graph = self.make_graph()
+        graph.all_pairs_shortest_paths()[0][1] = -999
+        graph.dijkstra(0)[2] = -999
+        self.assertEqual(graph.all_pairs_shortest_paths()[0][1], 2)
+        self.assertEqual(graph.dijkstra(0)[2], 5)
+
+    @unittest.skipIf(np is None, 'NumPy is not installed')
+    def test_array_results(self):
+        graph = self.make_graph()
+        graph.all_pairs_shortest_paths(as_array=True)[0, 1] = -999
+        distances, hops = graph.all_pairs_shortest_paths(next_hop=True, as_array=True)
+        distances[0, 2] = -999
+        hops[0, 2] = -1
+        self.assertEqual(graph.all_pairs_shortest_paths(as_array=True)[0, 1], 2)
+        distances, hops = graph.all_pairs_shortest_paths(next_hop=True, as_array=True)
+        self.assertEqual((distances[0, 2], hops[0, 2]), (5, 1))
+        self.assertEqual(graph.cache_stats()['hits'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
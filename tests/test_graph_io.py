@@ -0,0 +1,177 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Round-trip tests for graph snapshots and the copies built from the same CSR conversion
+
+import os
+import tempfile
+import unittest
+
+from d_graph import DirectedGraph
+from ud_graph import UndirectedGraph
+
+
+class MixedWeightSnapshotTest(unittest.TestCase):
+    """
+    Graphs holding both int and float weights (including whole floats like 2.0) must come back with the same weight
+    types from a snapshot, freeze() and the shared-memory worker pool.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'graph.snap')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_graph(self, storage):
+        graph = DirectedGraph(storage=storage)
+        graph.add_vertices(4)
+        graph.add_edges_from([(0, 1, 3), (1, 2, 2.0), (2, 3, 0.5), (0, 3, 7), (3, 1, 4.0)])
+        return graph
+
+    def assertSameGraph(self, loaded, graph):
+        self.assertEqual(loaded.get_edges(), graph.get_edges())
+        self.assertEqual([type(weight) for _, _, weight in loaded.get_edges()],
+                         [type(weight) for _, _, weight in graph.get_edges()])
+        self.assertEqual(str(loaded), str(graph))
+        for src in range(graph.v_count):
+            self.assertEqual(loaded.dijkstra(src), graph.dijkstra(src))
+            self.assertEqual([type(d) for d in loaded.dijkstra(src)], [type(d) for d in graph.dijkstra(src)])
+
+    def test_save_load(self):
+        for storage in ('dense', 'sparse'):
+            for mmap in (True, False):
+                with self.subTest(storage=storage, mmap=mmap):
+                    graph = self.make_graph(storage)
+                    graph.save(self.path)
+                    loaded = DirectedGraph.load(self.path, mmap=mmap)
+                    self.assertSameGraph(loaded, graph)
+                    self.assertSameGraph(loaded.freeze(), graph)
+
+    def test_save_load_int_only(self):
+        for storage in ('dense', 'sparse'):
+            with self.subTest(storage=storage):
+                graph = self.make_graph(storage)
+                graph.add_edge(2, 3, 9)
+                graph.add_edge(1, 2, 2)
+                graph.add_edge(3, 1, 4)
+                graph.save(self.path)
+                self.assertSameGraph(DirectedGraph.load(self.path), graph)
+
+    def test_freeze(self):
+        for storage in ('dense', 'sparse'):
+            with self.subTest(storage=storage):
+                graph = self.make_graph(storage)
+                self.assertSameGraph(graph.freeze(), graph)
+
+    def test_dijkstra_many(self):
+        for storage in ('dense', 'sparse'):
+            with self.subTest(storage=storage):
+                graph = self.make_graph(storage)
+                results = dict(graph.dijkstra_many(range(graph.v_count), workers=2))
+                for src in range(graph.v_count):
+                    self.assertEqual(results[src], graph.dijkstra(src))
+                    self.assertEqual([type(d) for d in results[src]], [type(d) for d in graph.dijkstra(src)])
+
+
+class UndirectedSnapshotTest(unittest.TestCase):
+    """
+    A loaded undirected graph reads its adjacency from the snapshot and copies it on the first change, which must not
+    touch the file or other graphs loaded from it.
+    """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'graph.snap')
+        self.make_graph().save(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def make_graph(self):
+        graph = UndirectedGraph(['AB', 'BC', 'CA', 'CD', 'EF', 'DG'])
+        graph.remove_vertex('B')
+        graph.add_edge('H', 'A')
+        return graph
+
+    def assertSameGraph(self, loaded, graph):
+        self.assertEqual(sorted(loaded.get_vertices()), sorted(graph.get_vertices()))
+        self.assertEqual(sorted(map(sorted, loaded.get_edges())), sorted(map(sorted, graph.get_edges())))
+        self.assertEqual(loaded.count_connected_components(), graph.count_connected_components())
+        for v in graph.get_vertices():
+            self.assertEqual(loaded.dfs(v), graph.dfs(v))
+            self.assertEqual(loaded.bfs(v), graph.bfs(v))
+
+    def test_load(self):
+        for mmap in (True, False):
+            with self.subTest(mmap=mmap):
+                self.assertSameGraph(UndirectedGraph.load(self.path, mmap=mmap), self.make_graph())
+
+    def test_change_after_load(self):
+        for mmap in (True, False):
+            with self.subTest(mmap=mmap):
+                loaded = UndirectedGraph.load(self.path, mmap=mmap)
+                other = UndirectedGraph.load(self.path, mmap=mmap)
+
+                loaded.add_edge('A', 'E')
+                loaded.remove_edge('C', 'D')
+                loaded.remove_vertex('H')
+                loaded.add_vertex('I')
+
+                graph = self.make_graph()
+                self.assertSameGraph(other, graph)
+                self.assertSameGraph(UndirectedGraph.load(self.path, mmap=mmap), graph)
+
+                graph.add_edge('A', 'E')
+                graph.remove_edge('C', 'D')
+                graph.remove_vertex('H')
+                graph.add_vertex('I')
+                self.assertSameGraph(loaded, graph)
+
+
+class UndirectedBulkLoadTest(unittest.TestCase):
+    """
+    Edges added in bulk (constructor, add_edges_from(), from_edge_list()) are grouped by vertex before they are
+    written, which must give the same vertices, neighbor order and components as add_edge() one edge at a time.
+    """
+
+    edges = [('A', 'B'), ('B', 'C'), ('C', 'A'), ('A', 'B'), ('B', 'A'), ('D', 'D'), ('C', 'D'), ('E', 'F'),
+             ('D', 'A'), ('G', 'E')]
+
+    def one_by_one(self, edges, graph=None):
+        graph = UndirectedGraph() if graph is None else graph
+        for u, v in edges:
+            graph.add_edge(u, v)
+        return graph
+
+    def assertSameGraph(self, bulk, graph):
+        self.assertEqual(str(bulk), str(graph))
+        self.assertEqual(bulk.get_edges(), graph.get_edges())
+        self.assertEqual(bulk.count_connected_components(), graph.count_connected_components())
+
+    def test_constructor(self):
+        self.assertSameGraph(UndirectedGraph(self.edges), self.one_by_one(self.edges))
+
+    def test_add_to_existing_graph(self):
+        bulk = UndirectedGraph(self.edges[:4])
+        graph = self.one_by_one(self.edges[:4])
+        for g in (bulk, graph):
+            g.remove_vertex('B')
+            self.assertEqual(g.count_connected_components(), 1)
+
+        bulk.add_edges_from(self.edges)
+        self.assertSameGraph(bulk, self.one_by_one(self.edges, graph))
+
+    def test_from_edge_list(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'edges.txt')
+            with open(path, 'w') as edgeFile:
+                edgeFile.write('# u v\n')
+                edgeFile.writelines(f'{u} {v}\n' for u, v in self.edges)
+
+            bulk = UndirectedGraph.from_edge_list(path, chunk_lines=1)
+            self.assertSameGraph(bulk, self.one_by_one(self.edges))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+# Course: CS261 - Data Structures
+# Author: Austin Sahba
+# Description: Thread-safety tests for the reachability index
+
+import sys
+import threading
+import unittest
+
+from d_graph import DirectedGraph
+
+
+class ConcurrentReachabilityTest(unittest.TestCase):
+    """
+    Several threads querying a stale reachability index, so the first queries rebuild it while others read it.
+    """
+
+    def setUp(self):
+        self.switchInterval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switchInterval)
+
+    def check_stale_index(self, method):
+        n = 3000
+        cut = n // 2
+
+        for _ in range(3):
+
+            graph = DirectedGraph(storage='sparse')
+            graph.add_vertices(n)
+            graph.add_edges_from([(v, v + 1, 1) for v in range(n - 1)])
+            graph.build_reachability_index(method)
+            graph.remove_edge(cut, cut + 1)
+            errors = []
+
+            def work(k):
+                try:
+                    for i in range(400):
+                        u = (i * 37 + k * 101) % n
+                        v = (i * 53 + k * 7) % n
+                        self.assertEqual(graph.reachable(u, v), u <= v and (v <= cut or u > cut), (u, v))
+                except Exception as error:
+                    errors.append(error)
+
+            threads = [threading.Thread(target=work, args=(k,)) for k in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            self.assertEqual(graph.reachability_stats()['rebuilds'], 2)
+
+    def test_closure_rebuild(self):
+        self.check_stale_index('closure')
+
+    def test_interval_rebuild(self):
+        self.check_stale_index('interval')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,7 +2,580 @@
 # Author: Austin Sahba
 # Description: Graph Implementation
 
+from array import array
 from collections import deque
+from collections.abc import Mapping
+import threading
+
+from graph_batch import DeltaLog, UndirectedBatch
+from graph_io import read_edges, read_undirected_snapshot, write_undirected_snapshot
+from graph_stats import Instrumentation
+
+# rows with at least this many neighbors also keep a set of them, so membership does not scan the row
+HUB_DEGREE = 32
+
+
+class PackedAdjacency:
+    """
+    Class to hold the neighbor IDs of every vertex of an UndirectedGraph in one packed integer array, indexed by ID
+    - the neighbors of i are slab[start[i]:end[i]] in insertion order, so a neighbor costs 4 bytes and a vertex the
+      three 8 byte offsets start, end and limit instead of a container object of its own
+    - a row grows in place up to limit[i]; a full row is copied to the end of slab with twice the room, and slab is
+      compacted once the slots left behind make up a quarter of it
+    - rows with at least HUB_DEGREE neighbors get a set of them in hubs on their first membership test, so has() stays
+      O(1) for high degree vertices
+    - the arrays may also be memoryviews over CSR arrays (see from_csr), which are read in place and copied into
+      arrays of its own on the first write
+    """
+
+    __slots__ = ('slab', 'start', 'end', 'limit', 'hubs', 'garbage', 'shared')
+
+    def __init__(self):
+        self.slab = array('i')
+        self.start = array('q')
+        self.end = array('q')
+        self.limit = array('q')
+        self.hubs = dict()
+        self.garbage = 0
+        self.shared = False
+
+    @classmethod
+    def from_csr(cls, offsets, targets):
+        """
+        Wrap CSR arrays (for example memoryviews over a mapped snapshot) without copying them: row i is
+        targets[offsets[i]:offsets[i + 1]], with no room to grow.
+        """
+        adjacency = cls()
+        adjacency.slab = targets
+        adjacency.start = offsets[:-1]
+        adjacency.end = adjacency.limit = offsets[1:]
+        adjacency.shared = True
+        return adjacency
+
+    def __len__(self):
+        return len(self.start)
+
+    def __getitem__(self, i):
+        """
+        Return the neighbor IDs of i in insertion order (a copy).
+        """
+        return self.slab[self.start[i]:self.end[i]]
+
+    def add_row(self) -> None:
+        """
+        This method adds an empty row for the next ID, with no room of its own yet.
+        """
+
+        if self.shared:
+            self._own()
+
+        position = len(self.slab)
+        self.start.append(position)
+        self.end.append(position)
+        self.limit.append(position)
+
+    def add_rows(self, count: int) -> None:
+        """
+        This method adds count empty rows, as add_row() does one.
+        """
+
+        if self.shared:
+            self._own()
+
+        position = array('q', [len(self.slab)]) * count
+        self.start.extend(position)
+        self.end.extend(position)
+        self.limit.extend(position)
+
+    def clear(self, i: int) -> None:
+        """
+        This method empties row i (its vertex was removed), leaving its slots behind.
+        """
+
+        if self.shared:
+            self._own()
+
+        self.garbage += self.limit[i] - self.start[i]
+        position = len(self.slab)
+        self.start[i] = self.end[i] = self.limit[i] = position
+        self.hubs.pop(i, None)
+
+    def degree(self, i: int) -> int:
+        """
+        This method returns the number of neighbors of i.
+        """
+
+        return self.end[i] - self.start[i]
+
+    def has(self, i: int, j: int) -> bool:
+        """
+        This method returns True if j is a neighbor of i.
+        """
+
+        start, end = self.start[i], self.end[i]
+        if end - start < HUB_DEGREE:
+            return j in self.slab[start:end]
+
+        hub = self.hubs.get(i)
+        if hub is None:
+            hub = self.hubs[i] = set(self.slab[start:end])
+        return j in hub
+
+    def add(self, i: int, j: int) -> None:
+        """
+        This method appends j to the neighbors of i. j must not be one already.
+        """
+
+        if self.shared:
+            self._own()
+
+        start, end = self.start[i], self.end[i]
+        if end == self.limit[i]:
+            end = self._grow(i, (end - start) * 2 + 4)
+
+        self.slab[end] = j
+        self.end[i] = end + 1
+
+        if i in self.hubs:
+            self.hubs[i].add(j)
+
+    def extend(self, i: int, ids) -> None:
+        """
+        This method appends the IDs in ids (none of them a neighbor of i yet) to the neighbors of i, growing the row at
+        most once. An empty row gets exactly the room it needs.
+        """
+
+        if self.shared:
+            self._own()
+
+        start, end = self.start[i], self.end[i]
+        count = len(ids)
+        if end + count > self.limit[i]:
+            size = end - start
+            end = self._grow(i, size + count if size == 0 else max(size * 2 + 4, size + count))
+
+        self.slab[end:end + count] = array('i', ids)
+        self.end[i] = end + count
+
+        if i in self.hubs:
+            self.hubs[i].update(ids)
+
+    def extend_rows(self, rows) -> int:
+        """
+        This method appends ids to the neighbors of i for every (i, ids) pair in rows, skipping repeats, i itself and
+        IDs that are neighbors of i already, and returns how many it added. Empty rows are written one after the other
+        at the end of slab with exactly the room they need, the others go through extend().
+        """
+
+        if self.shared:
+            self._own()
+
+        start, end, limit = self.start, self.end, self.limit
+        added = 0
+
+        for i, ids in rows:
+
+            ids = dict.fromkeys(ids)
+            ids.pop(i, None)
+
+            if end[i] > start[i]:
+                for j in self.slab[start[i]:end[i]]:
+                    ids.pop(j, None)
+                if len(ids) > 0:
+                    self.extend(i, ids)
+                    added += len(ids)
+                continue
+
+            self.garbage += limit[i] - start[i]
+            position = len(self.slab)
+            self.slab.extend(ids)
+            start[i] = position
+            end[i] = limit[i] = position + len(ids)
+            added += len(ids)
+
+        return added
+
+    def link(self, i: int, j: int) -> bool:
+        """
+        This method adds j to the neighbors of i and i to the neighbors of j, unless they are neighbors already.
+        Returns True if the edge was added.
+        """
+
+        start, end = self.start[i], self.end[i]
+        if end - start < HUB_DEGREE:
+            if j in self.slab[start:end]:
+                return False
+        elif self.has(i, j):
+            return False
+
+        self.add(i, j)
+        self.add(j, i)
+        return True
+
+    def discard(self, i: int, j: int) -> None:
+        """
+        This method removes j from the neighbors of i, shifting the later ones down to keep their order. j must be a
+        neighbor of i.
+        """
+
+        if self.shared:
+            self._own()
+
+        slab = self.slab
+        end = self.end[i]
+        k = slab.index(j, self.start[i], end)
+        slab[k:end - 1] = slab[k + 1:end]
+        self.end[i] = end - 1
+
+        hub = self.hubs.get(i)
+        if hub is not None:
+            hub.discard(j)
+            if end - 1 - self.start[i] < HUB_DEGREE:
+                del self.hubs[i]
+
+    def in_order(self, i: int, names) -> []:
+        """
+        This method returns the neighbor IDs of i sorted by their names.
+        """
+
+        return sorted(self.slab[self.start[i]:self.end[i]], key=names.__getitem__)
+
+    def _own(self) -> None:
+        """
+        This method copies shared CSR arrays into arrays of its own before the first write, leaving what they were read
+        from untouched.
+        """
+
+        if self.slab.format == 'i':
+            slab = array('i')
+            slab.frombytes(self.slab.cast('B'))
+        else:
+            slab = array('i', self.slab)
+
+        offsets = [array('q'), array('q'), array('q')]
+        for owned, shared in zip(offsets, (self.start, self.end, self.limit)):
+            owned.frombytes(shared.cast('B'))
+
+        self.slab = slab
+        self.start, self.end, self.limit = offsets
+        self.shared = False
+
+    def _grow(self, i: int, room: int) -> int:
+        """
+        This method gives row i room for room neighbors: in place if it is the last row in slab, otherwise by copying
+        it to the end, compacting slab afterwards if too many slots were left behind. Returns the new end of the row.
+        """
+
+        slab = self.slab
+        start, end, limit = self.start[i], self.end[i], self.limit[i]
+        size = end - start
+
+        if limit == len(slab):
+            slab.frombytes(bytes(slab.itemsize * (start + room - limit)))
+            self.limit[i] = start + room
+            return end
+
+        position = len(slab)
+        slab.extend(slab[start:end])
+        slab.frombytes(bytes(slab.itemsize * (room - size)))
+        self.garbage += limit - start
+        self.start[i] = position
+        self.end[i] = position + size
+        self.limit[i] = position + room
+
+        if self.garbage > len(slab) // 4:
+            self._compact()
+
+        return self.end[i]
+
+    def _compact(self) -> None:
+        """
+        This method copies every row, with its room, into a new slab in ID order, dropping the slots left behind.
+        """
+
+        old = self.slab
+        slab = array('i')
+        start, end, limit = self.start, self.end, self.limit
+
+        for i in range(len(start)):
+            position = len(slab)
+            slab.extend(old[start[i]:limit[i]])
+            end[i] = position + end[i] - start[i]
+            limit[i] = position + limit[i] - start[i]
+            start[i] = position
+
+        self.slab = slab
+        self.garbage = 0
+
+
+class NeighborView:
+    """
+    Class to present the neighbor IDs of one vertex by name, printing like the list it used to be
+    """
+
+    __slots__ = ('_neighbors', '_graph')
+
+    def __init__(self, neighbors, graph):
+        self._neighbors = neighbors
+        self._graph = graph
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __len__(self):
+        return len(self._neighbors)
+
+    def __iter__(self):
+        names = self._graph._names
+        for i in self._neighbors:
+            yield names[i]
+
+    def __contains__(self, v):
+        return self._graph._ids.get(v, -1) in self._neighbors
+
+
+class FrozenAdjacency:
+    """
+    Class to hold the adjacency of a FrozenUndirectedGraph as CSR arrays, read like a PackedAdjacency
+    - the neighbors of i are targets[offsets[i]:offsets[i + 1]] in insertion order, and ordered holds the same
+      slices sorted by name
+    """
+
+    __slots__ = ('offsets', 'targets', 'ordered')
+
+    def __init__(self, offsets, targets, ordered):
+        self.offsets = offsets
+        self.targets = targets
+        self.ordered = ordered
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def degree(self, i: int) -> int:
+        return self.offsets[i + 1] - self.offsets[i]
+
+    def has(self, i: int, j: int) -> bool:
+        return j in self.targets[self.offsets[i]:self.offsets[i + 1]]
+
+    def in_order(self, i: int, names) -> array:
+        """
+        This method returns the neighbor IDs of i sorted by their names, as computed at freeze time.
+        """
+
+        return self.ordered[self.offsets[i]:self.offsets[i + 1]]
+
+
+class AdjacencyView(Mapping):
+    """
+    Class to present the interned adjacency of an UndirectedGraph as a read-only dict of vertex name -> neighbors
+    """
+
+    __slots__ = ('_graph',)
+
+    def __init__(self, graph):
+        self._graph = graph
+
+    def __getitem__(self, v):
+        return NeighborView(self._graph._adj[self._graph._ids[v]], self._graph)
+
+    def __iter__(self):
+        return iter(self._graph._ids)
+
+    def __len__(self):
+        return len(self._graph._ids)
+
+    def __contains__(self, v):
+        return v in self._graph._ids
+
+
+class ComponentIndex:
+    """
+    Class to track the connected components of an undirected graph with union-find over vertex IDs
+    - vertices are merged by size with path halving, so add and union are near constant time
+    - parent, size and next are integer arrays indexed by ID; parent is -1 for IDs that are not in the index
+    - next links the members of every component into a circle, so two components are merged by swapping two links
+    - the index is built on the first query (built is False until then, and add, union and mark_dirty do nothing), so
+      graphs that never ask about components pay nothing for it; afterwards it is kept up to date, except that bulk
+      edge additions drop it to be built again by the next query
+    - removals only mark the affected component dirty, it is rebuilt on the next query
+    - queries hold lock while they refresh and read the index, so read-only graph methods running on several threads
+      at once (as under AsyncGraph) never see a component half way through its rebuild
+    """
+
+    def __init__(self):
+        self.parent = array('l')
+        self.size = array('l')
+        self.next = array('l')
+        self.dirty = set()
+        self.count = 0
+        self.built = False
+        self.lock = threading.Lock()
+
+    def __contains__(self, v):
+        return v < len(self.parent) and self.parent[v] >= 0
+
+    def add(self, v) -> None:
+        """
+        This method adds v as a component of its own.
+        """
+
+        if not self.built:
+            return
+
+        if v >= len(self.parent):
+            missing = v + 1 - len(self.parent)
+            self.parent.extend(array('l', [-1]) * missing)
+            self.size.extend(array('l', [0]) * missing)
+            self.next.extend(array('l', [-1]) * missing)
+
+        self.parent[v] = v
+        self.size[v] = 1
+        self.next[v] = v
+        self.count += 1
+
+    def members(self, root) -> []:
+        """
+        This method returns every vertex in the component of root by following the circle of next links.
+        """
+
+        vertices = [root]
+        v = self.next[root]
+        while v != root:
+            vertices.append(v)
+            v = self.next[v]
+
+        return vertices
+
+    def find(self, v):
+        """
+        This method returns the root of v's component, halving the path on the way up.
+        """
+
+        parent = self.parent
+        while parent[v] != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+
+        return v
+
+    def union(self, u, v) -> None:
+        """
+        This method merges the components of u and v under the root of the larger one and joins their member
+        circles. A merged component stays dirty if either side was.
+        """
+
+        if not self.built:
+            return
+
+        rootU = self.find(u)
+        rootV = self.find(v)
+        if rootU == rootV:
+            return
+
+        if self.size[rootU] < self.size[rootV]:
+            rootU, rootV = rootV, rootU
+
+        self.parent[rootV] = rootU
+        self.size[rootU] += self.size[rootV]
+        self.next[rootU], self.next[rootV] = self.next[rootV], self.next[rootU]
+        self.count -= 1
+
+        if rootV in self.dirty:
+            self.dirty.discard(rootV)
+            self.dirty.add(rootU)
+
+    def invalidate(self) -> None:
+        """
+        This method drops the index, so the next refresh() builds it from scratch.
+        """
+
+        self.parent = array('l')
+        self.size = array('l')
+        self.next = array('l')
+        self.dirty = set()
+        self.count = 0
+        self.built = False
+
+    def mark_dirty(self, v) -> None:
+        """
+        This method records that an edge or vertex was removed from v's component, so it may have split.
+        """
+
+        if self.built:
+            self.dirty.add(self.find(v))
+
+    def refresh(self, adjacency, names) -> None:
+        """
+        This method brings the index up to date with adjacency (neighbor IDs by vertex) and names (None for removed
+        vertices). An index that was never built is built from scratch. Otherwise every dirty component is rebuilt:
+        members that are no longer in the graph are dropped, the rest are reset to single vertex components and merged
+        again along their edges. Components that were not touched by a removal are left as they are.
+        """
+
+        if not self.built:
+            self._build(adjacency, names)
+            return
+
+        dirty = self.dirty
+        self.dirty = set()
+
+        for root in dirty:
+
+            vertices = self.members(root)
+            self.count -= 1
+
+            for v in vertices:
+                if names[v] is not None:
+                    self.add(v)
+                else:
+                    self.parent[v] = -1
+
+            for v in vertices:
+                if names[v] is not None:
+                    for neighbor in adjacency[v]:
+                        self.union(v, neighbor)
+
+    def _build(self, adjacency, names) -> None:
+        """
+        This method labels every component with one search over the whole graph: each member points straight at the
+        vertex the search started from, which becomes the root, and the members are linked into a circle in the order
+        they were reached.
+        """
+
+        n = len(names)
+        parent = array('l', [-1]) * n
+        size = array('l', [0]) * n
+        circle = array('l', [-1]) * n
+        count = 0
+
+        for root in range(n):
+
+            if names[root] is None or parent[root] >= 0:
+                continue
+
+            parent[root] = root
+            members = [root]
+            for v in members:
+                for neighbor in adjacency[v]:
+                    if parent[neighbor] < 0:
+                        parent[neighbor] = root
+                        members.append(neighbor)
+
+            for k in range(len(members) - 1):
+                circle[members[k]] = members[k + 1]
+            circle[members[-1]] = root
+            size[root] = len(members)
+            count += 1
+
+        self.parent = parent
+        self.size = size
+        self.next = circle
+        self.count = count
+        self.dirty = set()
+        self.built = True
 
 
 class UndirectedGraph:
@@ -12,20 +585,30 @@ class UndirectedGraph:
     - loops not allowed
     - no edge weights
     - vertex names are strings
+    - names are interned to dense integer IDs, which is what the adjacency and all traversals work on
     """
 
     def __init__(self, start_edges=None):
         """
         Store graph info as adjacency list
-        DO NOT CHANGE THIS METHOD IN ANY WAY
+        Vertex names are interned: _ids maps name -> ID, _names (None once removed) and the PackedAdjacency _adj are
+        indexed by ID, and removed IDs are reused from _free. Connected components are tracked in a ComponentIndex
+        from the first component query on.
         """
-        self.adj_list = dict()
+        self._ids = dict()
+        self._names = []
+        self._adj = PackedAdjacency()
+        self._free = []
+        self._components = ComponentIndex()
+        self._instrumentation = None
+        self._frozen = None
+        self._delta_log = None
+        self.version = 0
 
         # populate graph with initial vertices and edges (if provided)
         # before using, implement add_vertex() and add_edge() methods
         if start_edges is not None:
-            for u, v in start_edges:
-                self.add_edge(u, v)
+            self.add_edges_from(start_edges)
 
     def __str__(self):
         """
@@ -39,277 +622,714 @@ class UndirectedGraph:
             return f'GRAPH: {{{out}}}'
         return f'GRAPH: {{\n  {out}}}'
 
+    @property
+    def adj_list(self):
+        """
+        Read-only view of the graph as a dict of vertex name -> neighbor names.
+        """
+        return AdjacencyView(self)
+
     # ------------------------------------------------------------------ #
 
     def add_vertex(self, v: str) -> None:
         """
-        This method adds a vertex to the dictionary listed as self.adj_list. If the vertex was already present
-        in the dictionary, the method does not do anything.
+        This method interns a new vertex name, reusing the ID (and the emptied neighbor row) of a removed vertex when
+        one is free. If the vertex was already present, the method does not do anything.
         """
 
-        if v not in self.adj_list:
-            self.adj_list[v] = []
+        if v not in self._ids:
+
+            if len(self._free) > 0:
+                i = self._free.pop()
+                if i in self._components:
+                    # the ID's old vertex was removed but its component has not been rebuilt yet
+                    self._components.refresh(self._adj, self._names)
+                self._names[i] = v
+            else:
+                i = len(self._names)
+                self._names.append(v)
+                self._adj.add_row()
+
+            self._ids[v] = i
+            self._components.add(i)
+            self.version += 1
+
+            if self._delta_log is not None:
+                self._delta_log.append([('add_vertex', v)])
 
     def add_edge(self, u: str, v: str) -> None:
         """
         This method first confirms that the vertexes are not equal to each other. It then adds both vertexes to the
-        dictionary as keys if they are not already present. Lastly it adds each vertex to the other vertex adjacency
-        list.
+        graph if they are not already present. Lastly it adds each vertex ID to the other vertex neighbor row.
         """
 
         if u != v:
 
-            self.add_vertex(u)
-            self.add_vertex(v)
+            if u not in self._ids:
+                self.add_vertex(u)
+            if v not in self._ids:
+                self.add_vertex(v)
 
-            if v not in self.adj_list[u]:
-                self.adj_list[u].append(v)
+            i = self._ids[u]
+            j = self._ids[v]
+            if self._adj.link(i, j):
+                self._components.union(i, j)
+                self.version += 1
 
-            if u not in self.adj_list[v]:
-                self.adj_list[v].append(u)
+                if self._delta_log is not None:
+                    self._delta_log.append([('add_edge', u, v)])
+
+    def add_vertices(self, vertices) -> None:
+        """
+        This method adds every vertex name in vertices, skipping the ones already present.
+        """
+
+        for v in vertices:
+            if v not in self._ids:
+                self.add_vertex(v)
+
+    def add_edges_from(self, edges) -> None:
+        """
+        This method adds (u, v) edges in bulk with the same rules as add_edge(): loops are skipped, missing vertices
+        are created and an edge that is already present is left alone. Names are looked up once per endpoint and the
+        new neighbors are grouped by vertex, so each row is written once (see _group_edges()). While a delta log is
+        kept the edges are added one by one instead, to log the ones that were new.
+        """
+
+        if self._delta_log is None:
+            pending = dict()
+            self._group_edges(edges, pending)
+            self._write_rows(pending)
+            return
+
+        ids = self._ids
+        adj = self._adj
+        components = self._components
+        added = []
+
+        for u, v in edges:
+
+            if u == v:
+                continue
+
+            i = ids.get(u)
+            if i is None:
+                self.add_vertex(u)
+                i = ids[u]
+
+            j = ids.get(v)
+            if j is None:
+                self.add_vertex(v)
+                j = ids[v]
+
+            if adj.link(i, j):
+                components.union(i, j)
+                added.append(('add_edge', u, v))
+
+        self.version += 1
+        self._delta_log.append(added)
+
+    def _group_edges(self, edges, pending) -> None:
+        """
+        This method groups edges (skipping loops) by endpoint in pending, a dict of name -> list holding the ID of the
+        name followed by its neighbor IDs in edge order, so an endpoint costs a single lookup. Names are interned the
+        first time they are grouped. Nothing is written to the neighbor rows yet, see _write_rows().
+        """
+
+        ids = self._ids
+        names = self._names
+        reuse = len(self._free) > 0
+        group = pending.get
+
+        for u, v in edges:
+
+            if u == v:
+                continue
+
+            rowU = group(u)
+            if rowU is None:
+                i = ids.get(u)
+                if i is None:
+                    if reuse:
+                        self.add_vertex(u)
+                        i = ids[u]
+                    else:
+                        i = ids[u] = len(names)
+                        names.append(u)
+                rowU = pending[u] = [i]
+
+            rowV = group(v)
+            if rowV is None:
+                j = ids.get(v)
+                if j is None:
+                    if reuse:
+                        self.add_vertex(v)
+                        j = ids[v]
+                    else:
+                        j = ids[v] = len(names)
+                        names.append(v)
+                rowV = pending[v] = [j]
+
+            rowU.append(rowV[0])
+            rowV.append(rowU[0])
+
+        # names interned above without add_vertex() still need their (empty) rows
+        self._adj.add_rows(len(names) - len(self._adj))
+
+    def _write_rows(self, pending) -> None:
+        """
+        This method appends the neighbor IDs grouped by _group_edges() to the neighbor rows, each row in one go (see
+        PackedAdjacency.extend_rows()), which keeps the neighbor order add_edge() would give. A component index that
+        was built is rebuilt once, on the next component query, instead of merging along every new edge.
+        """
+
+        rows = ((row[0], row) for row in pending.values())
+        if self._adj.extend_rows(rows) > 0 and self._components.built:
+            self._components.invalidate()
+
+        self.version += 1
+
+    @classmethod
+    def from_edge_list(cls, path, delimiter=None, header=False, chunk_lines=100000):
+        """
+        This method builds a graph from a 'u v' edge list file (comma separated for .csv, whitespace otherwise). The
+        file is streamed in chunks whose names are interned and whose edges are grouped by vertex as they are read,
+        and the neighbor rows are written once at the end (see _group_edges()).
+        """
+
+        graph = cls()
+        pending = dict()
+
+        for chunk in read_edges(path, delimiter, header, chunk_lines):
+            graph._group_edges(chunk, pending)
+
+        graph._write_rows(pending)
+        return graph
+
+    def save(self, path) -> None:
+        """
+        This method writes the graph to a versioned binary snapshot: a table of vertex names followed by CSR arrays of
+        neighbor IDs. Live vertices are renumbered densely in insertion order and neighbors keep their insertion order,
+        so the loaded graph prints and traverses the same.
+        """
+
+        dense = dict()
+        for i in self._ids.values():
+            dense[i] = len(dense)
+
+        offsets = array('q', [0])
+        targets = array('i')
+        for i in self._ids.values():
+            targets.extend([dense[j] for j in self._adj[i]])
+            offsets.append(len(targets))
+
+        write_undirected_snapshot(path, list(self._ids), offsets, targets)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        This method opens a snapshot written by save(). With mmap=True the file is memory-mapped copy-on-write and the
+        adjacency reads the CSR arrays straight from the mapped pages, so processes loading the same file share them;
+        the first change to the graph copies the arrays (see PackedAdjacency.from_csr). The vertex names are decoded
+        into the name table, and the component index is built on the first component query.
+        """
+
+        names, offsets, targets = read_undirected_snapshot(path, mmap)
+        graph = cls()
+        graph._names = names
+        graph._ids = {name: i for i, name in enumerate(names)}
+        graph._adj = PackedAdjacency.from_csr(offsets, targets)
+
+        return graph
 
     def remove_edge(self, v: str, u: str) -> None:
         """
-        This method checks to see if both v and u are keys in the dictionary. If so, then if they are present as
-        values in each others adjacency list, they are removed.
+        This method checks to see if both v and u are in the graph. If so, then if they are present in each others
+        neighbor rows, they are removed.
         """
 
-        if v in self.adj_list and u in self.adj_list:
+        if v in self._ids and u in self._ids:
 
-            if v in self.adj_list[u]:
-                self.adj_list[u].remove(v)
+            i = self._ids[v]
+            j = self._ids[u]
+            if self._adj.has(j, i):
+                self._adj.discard(j, i)
+                self._adj.discard(i, j)
+                self._components.mark_dirty(i)
+                self.version += 1
 
-            if u in self.adj_list[v]:
-                self.adj_list[v].remove(u)
+                if self._delta_log is not None:
+                    self._delta_log.append([('remove_edge', v, u)])
 
     def remove_vertex(self, v: str) -> None:
         """
-        This method checks if v is a key in the dictionary. If so, it first deletes that key entry. Then it checks
-        all other keys in the dictionary if v is a value for them, and removes v each time.
+        This method checks if v is in the graph. If so, it removes v from the neighbor row of each of its neighbors,
+        then empties its own row and releases its name and ID, so only v's neighbors are touched.
         """
 
-        if v in self.adj_list:
+        if v in self._ids:
 
-            del self.adj_list[v]
-            for key in self.adj_list:
+            i = self._ids.pop(v)
+            self._components.mark_dirty(i)
+            for neighbor in self._adj[i]:
+                self._adj.discard(neighbor, i)
 
-                if v in self.adj_list[key]:
-                    self.adj_list[key].remove(v)
+            self._adj.clear(i)
+            self._names[i] = None
+            self._free.append(i)
+            self.version += 1
 
-    def get_vertices(self) -> []:
+            if self._delta_log is not None:
+                self._delta_log.append([('remove_vertex', v)])
+
+    def batch(self) -> UndirectedBatch:
         """
-        This method creates an empty array named output, then runs through the dictionary and adds each key to the
-        array. It then returns output.
+        This method returns a transaction for use in a with block. Mutations made through it (add_vertex,
+        add_vertices, add_edge, add_edges_from, remove_edge, remove_vertex) are buffered and applied together when the
+        block ends: repeated operations collapse, an add followed by a remove cancels out, and removing a vertex drops
+        the pending operations on its edges. The graph version moves only once. If the block raises, nothing is
+        applied; if applying fails, what was applied is undone (removed vertices come back with their edges, though
+        they may print in a different position).
         """
 
-        output = []
+        return UndirectedBatch(self)
 
-        for key in self.adj_list:
-            output.append(key)
+    def enable_delta_log(self, path=None) -> DeltaLog:
+        """
+        This method starts recording every change to the graph in an append-only DeltaLog (one entry per mutating
+        call or committed batch), which DeltaLog.replay() applies to a replica. With a path the entries are also
+        appended to that file as JSON lines.
+        """
 
-        return output
+        self._delta_log = DeltaLog(path)
+        return self._delta_log
+
+    def disable_delta_log(self) -> None:
+        """
+        This method stops recording changes.
+        """
+
+        self._delta_log = None
+
+    def freeze(self):
+        """
+        This method returns a read-only FrozenUndirectedGraph with the vertices renumbered densely and the adjacency
+        packed into CSR arrays, including every neighbor list already sorted by name for dfs() and bfs(). It supports
+        all the query methods and shares nothing with this graph, so its readers never see later writes here. The
+        snapshot is kept until the graph changes, so freezing an unchanged graph again is O(1) and returns the same
+        object.
+        """
+
+        if self._frozen is None or self._frozen.version != self.version:
+            self._frozen = FrozenUndirectedGraph.from_graph(self)
+
+        return self._frozen
+
+    def instrument(self, callback=None) -> Instrumentation:
+        """
+        This method turns on traversal counters for dfs and bfs. Each call produces a TraversalStats (vertices
+        expanded, edges relaxed, pushes, pops, max frontier size, wall time) that is stored on the returned
+        Instrumentation and passed to callback if one is given.
+        """
+
+        self._instrumentation = Instrumentation(callback)
+        return self._instrumentation
+
+    def uninstrument(self) -> None:
+        """
+        This method turns the traversal counters off again, so dfs and bfs skip all counting.
+        """
+
+        self._instrumentation = None
+
+    def get_vertices(self) -> []:
+        """
+        This method returns an array with the name of every vertex, in the order they were added.
+        """
+
+        return list(self._ids)
 
     def get_edges(self) -> []:
         """
-        This function creates an output array and a dictionary named already used. It then runs through all keys
-        in the self.adj_list dictionary and runs through all corresponding values. If the tuple (key, value) is not in
-        the dictionary already used, then it adds the tuple to the output array and adds the reverse tuple (value, key)
-        to the already used dictionary to prevent repeats from occurring.
+        This method runs through every vertex and its neighbors in insertion order and outputs the tuple (vertex,
+        neighbor) unless the neighbor was already processed, in which case the edge was output from the other end.
         """
 
+        names = self._names
+        done = bytearray(len(names))
         output = []
-        alreadyUsed = dict()
 
-        for key in self.adj_list:
+        for key, i in self._ids.items():
 
-            for value in self.adj_list[key]:
+            for j in self._adj[i]:
 
-                if (key, value) not in alreadyUsed:
-                    output.append((key, value))
-                    alreadyUsed[(value, key)] = 1
+                if not done[j]:
+                    output.append((key, names[j]))
+
+            done[i] = 1
 
         return output
 
     def is_valid_path(self, path: []) -> bool:
         """
-        This method first checks path inputs of length 1 and confirms that the vertex is in the dictionary, or else
+        This method first checks path inputs of length 1 and confirms that the vertex is in the graph, or else
         it returns false. It then runs through the path array and checks each vertex and its neighbor. If all pairs are
-        both in the dictionary and the second vertex is in the first vertexes adjacency list, the method will return
+        both in the graph and the second vertex is in the first vertexes neighbor row, the method will return
         True. If not, it will return false.
         """
 
         if len(path) == 1:
 
-            if path[0] not in self.adj_list:
+            if path[0] not in self._ids:
                 return False
 
         for i in range(len(path) - 1):
 
-            if path[i] not in self.adj_list or path[i + 1] not in self.adj_list:
+            if path[i] not in self._ids or path[i + 1] not in self._ids:
                 return False
 
-            if path[i + 1] not in self.adj_list[path[i]]:
+            if not self._adj.has(self._ids[path[i]], self._ids[path[i + 1]]):
                 return False
 
         return True
 
     def dfs(self, v_start, v_end=None) -> []:
         """
-        This method creates a visited dictionary. It then checks the case where the given starting node is not in
-        the self.adj_list, to which is would return an empty array. It then initiates a stack with the starting node
-        and proceeds to do a depth first search, keeping track of the order visited. Children are added to the
-        stack in alphabetical order. If a target node was included and it is found in the search, a visited order
-        array is returned. Otherwise, this array is returned at the end.
+        This method checks the case where the given starting node is not in the graph, to which is would return an
+        empty array. It then initiates a stack with the starting node's ID and proceeds to do a depth first search,
+        marking visited IDs in a bytearray and keeping track of the order visited. Children are added to the stack in
+        reverse of their cached alphabetical order, so they are popped alphabetically. If a target node was included
+        and it is found in the search, the visited order is returned right away. IDs are translated back to names only
+        for the output.
         """
 
-        visited = dict()
-
-        if v_start not in self.adj_list:
+        if v_start not in self._ids:
             return []
 
-        stack1 = [v_start]
+        target = self._ids.get(v_end, -1)
+        names = self._names
+        visited = bytearray(len(names))
+        order = []
+        stack1 = [self._ids[v_start]]
+        stats = self._instrumentation.begin('dfs') if self._instrumentation is not None else None
+        pops = 0
 
         while len(stack1) > 0:
 
             curr = stack1.pop()
+            pops += 1
 
-            if curr not in visited:
+            if not visited[curr]:
                 visited[curr] = 1
+                order.append(curr)
 
-                if curr == v_end:
-                    output = []
+                if curr == target:
+                    break
 
-                    for key in visited:
-                        output.append(key)
+                children = self._adj.in_order(curr, names)
+                stack1.extend(reversed(children))
 
-                    return output
+                if stats is not None:
+                    stats.vertices_expanded += 1
+                    stats.edges_relaxed += len(children)
+                    stats.max_frontier = max(stats.max_frontier, len(stack1))
 
-                children = []
+        if stats is not None:
+            stats.pops = pops
+            stats.pushes = pops + len(stack1)
+            self._instrumentation.end(stats)
 
-                for child in self.adj_list[curr]:
-                    children.append(child)
+        return [names[i] for i in order]
 
-                sortedChildren = sorted(children)
+    def bfs(self, v_start, v_end=None) -> []:
+        """
+        This method checks for the case where the node is not in the graph, then creates a deque with the start node's
+        ID in it. It proceeds to do a breadth first search, marking visited IDs in a bytearray. If it finds the
+        provided end node, it returns an array with all visited nodes. The children of a node are added to the end of
+        the queue in their cached alphabetical order.
+        """
 
-                for i in range(len(sortedChildren) - 1, -1, -1):
-                    stack1.append(sortedChildren[i])
+        if v_start not in self._ids:
+            return []
 
-        output = []
+        target = self._ids.get(v_end, -1)
+        names = self._names
+        visited = bytearray(len(names))
+        order = []
+        queue1 = deque([self._ids[v_start]])
+        stats = self._instrumentation.begin('bfs') if self._instrumentation is not None else None
+        pops = 0
 
-        for key in visited:
-            output.append(key)
+        while len(queue1) > 0:
 
-        return output
+            curr = queue1.popleft()
+            pops += 1
 
-    def bfs(self, v_start, v_end=None) -> []:
+            if not visited[curr]:
+                visited[curr] = 1
+                order.append(curr)
+
+                if curr == target:
+                    break
+
+                children = self._adj.in_order(curr, names)
+                queue1.extend(children)
+
+                if stats is not None:
+                    stats.vertices_expanded += 1
+                    stats.edges_relaxed += len(children)
+                    stats.max_frontier = max(stats.max_frontier, len(queue1))
+
+        if stats is not None:
+            stats.pops = pops
+            stats.pushes = pops + len(queue1)
+            self._instrumentation.end(stats)
+
+        return [names[i] for i in order]
+
+    def shortest_path(self, u: str, v: str, max_depth=None) -> []:
         """
-        This method creates a visited dictionary and checks for the case where the node is not in self.adj_list. It
-        then creates a deque with the start node in it. It proceeds to do a breadth first search. If it finds the
-        provided end node, it returns an array with all visited nodes. For the children of a node, it sorts them then
-        adds them to the end of the queue.
+        This method returns a path with the fewest edges from u to v as a list of names, or None if there is none
+        (or none with at most max_depth edges). Vertices in different components are rejected by the component index
+        without searching. Otherwise a breadth first search runs from both ends at once, always expanding one whole
+        level of the side with the smaller frontier, so only about b^(d/2) vertices per side are explored instead of
+        b^d. The first edge found between the two sides closes a shortest path.
         """
 
-        visited = dict()
+        if not self.connected(u, v):
+            return None
 
-        if v_start not in self.adj_list:
-            return []
+        source, target = self._ids[u], self._ids[v]
+        if source == target:
+            return [u]
 
-        queue1 = deque([v_start])
+        stats = self._instrumentation.begin('shortest_path') if self._instrumentation is not None else None
 
-        while len(queue1) > 0:
+        # side[x] is 1 when x was reached from u and 2 when reached from v; parent links point back towards each end
+        side = bytearray(len(self._names))
+        parent = array('l', [-1]) * len(self._names)
+        side[source], side[target] = 1, 2
+        frontiers = {1: [source], 2: [target]}
+        depth = 0
+        meeting = None
 
-            curr = queue1.popleft()
+        while meeting is None and len(frontiers[1]) > 0 and len(frontiers[2]) > 0:
 
-            if curr not in visited:
-                visited[curr] = 1
+            if max_depth is not None and depth >= max_depth:
+                break
 
-                if curr == v_end:
-                    output = []
+            mine = 1 if len(frontiers[1]) <= len(frontiers[2]) else 2
+            nextFrontier = []
 
-                    for key in visited:
-                        output.append(key)
+            for curr in frontiers[mine]:
 
-                    return output
+                neighbors = self._adj[curr]
+                if stats is not None:
+                    stats.vertices_expanded += 1
+                    stats.edges_relaxed += len(neighbors)
 
-                children = []
+                for child in neighbors:
+                    if side[child] == 0:
+                        side[child] = mine
+                        parent[child] = curr
+                        nextFrontier.append(child)
+                    elif side[child] != mine:
+                        meeting = (curr, child) if mine == 1 else (child, curr)
+                        break
 
-                for child in self.adj_list[curr]:
-                    children.append(child)
+                if meeting is not None:
+                    break
 
-                sortedChildren = sorted(children)
+            frontiers[mine] = nextFrontier
+            depth += 1
 
-                for i in range(len(sortedChildren)):
-                    queue1.append(sortedChildren[i])
+            if stats is not None:
+                stats.pushes += len(nextFrontier)
+                stats.max_frontier = max(stats.max_frontier, len(frontiers[1]) + len(frontiers[2]))
 
-        output = []
+        if stats is not None:
+            stats.pops = stats.vertices_expanded
+            self._instrumentation.end(stats)
 
-        for key in visited:
-            output.append(key)
+        if meeting is None:
+            return None
 
-        return output
+        # meeting is an edge (a, b) with a reached from u and b reached from v
+        path = []
+        curr = meeting[0]
+        while curr != -1:
+            path.append(curr)
+            curr = parent[curr]
+        path.reverse()
+
+        curr = meeting[1]
+        while curr != -1:
+            path.append(curr)
+            curr = parent[curr]
+
+        return [self._names[i] for i in path]
 
     def count_connected_components(self):
         """
-        This method creates a dictionary to keep track of which nodes have been visited already. It then goes
-        through every node in the self.adj_list and checks if it has been visited already. If it hasn't, it increases
-        the component number and performs a breadth first search at that node. For each node visited in the BFS, it
-        adds this node to the visited already dictionary. Once the whole process is complete, it returns the component
-        number.
+        This method returns the number of connected components. The component index is built by the first query and
+        kept up to date from then on, so later queries only rebuild components that lost an edge or vertex since.
         """
 
-        numberOfComponents = 0
+        with self._components.lock:
+            self._components.refresh(self._adj, self._names)
+            return self._components.count
 
-        nodesVisitedAlready = dict()
+    def connected(self, u: str, v: str) -> bool:
+        """
+        This method returns True if u and v are both in the graph and there is a path between them.
+        """
 
-        for key in self.adj_list:
+        if u not in self._ids or v not in self._ids:
+            return False
 
-            if key not in nodesVisitedAlready:
+        with self._components.lock:
+            self._components.refresh(self._adj, self._names)
+            return self._components.find(self._ids[u]) == self._components.find(self._ids[v])
 
-                numberOfComponents += 1
-                bfsNodes = self.bfs(key)
+    def component_of(self, v: str):
+        """
+        This method returns the representative vertex of v's connected component, or None if v is not in the graph.
+        Two vertices are in the same component exactly when they have the same representative, as long as the graph
+        is not changed in between.
+        """
 
-                for element in bfsNodes:
-                    if element not in nodesVisitedAlready:
-                        nodesVisitedAlready[element] = 1
+        if v not in self._ids:
+            return None
 
-        return numberOfComponents
+        with self._components.lock:
+            self._components.refresh(self._adj, self._names)
+            return self._names[self._components.find(self._ids[v])]
 
     def has_cycle(self):
         """
-        This method uses a breadth first search on every self.adj_list element that it hasn't visited yet to ensure
-        it does not miss any separate components. In the BFS, once it adds a child node to the queue, it deletes
-        the child node's reference back to the previous node. Therefore, if that specific BFS returns to a node
-        previously visited, we know a cycle exists.
+        This method returns True if the graph contains a cycle. It only reads the adjacency, so it can run alongside
+        other readers and leaves the graph unchanged.
+        """
+
+        return self._cycle_search() is not None
+
+    def find_cycle(self) -> []:
+        """
+        This method returns the vertices of one cycle in the order they are traversed (the last vertex is adjacent to
+        the first), or None if the graph is acyclic.
+        """
+
+        return self._cycle_search()
+
+    def _cycle_search(self):
+        """
+        This method performs an iterative depth first search from every vertex that has not been reached yet,
+        remembering the parent ID of every vertex (-1 for roots) and marking reached IDs in a bytearray. In an
+        undirected graph, meeting an already reached vertex that is not the parent of the current one means a non-tree
+        edge and therefore a cycle. Each vertex and edge is looked at a constant number of times. Returns the cycle as
+        a list of names, or None.
         """
 
-        nodesVisitedAlready = dict()
+        parent = array('l', [-1]) * len(self._names)
+        reached = bytearray(len(self._names))
+
+        for root in self._ids.values():
+
+            if reached[root]:
+                continue
+
+            reached[root] = 1
+            stack1 = [root]
+
+            while len(stack1) > 0:
+
+                curr = stack1.pop()
+
+                for child in self._adj[curr]:
+
+                    if child == parent[curr]:
+                        continue
+
+                    if reached[child]:
+                        return [self._names[i] for i in self._close_cycle(parent, curr, child)]
+
+                    reached[child] = 1
+                    parent[child] = curr
+                    stack1.append(child)
 
-        for key in self.adj_list:
+        return None
 
-            if key not in nodesVisitedAlready:
+    @staticmethod
+    def _close_cycle(parent, u, v) -> []:
+        """
+        This method builds the cycle formed by the non-tree edge (u, v): the parent links from u and from v are
+        followed up to their closest common ancestor and the two halves are joined.
+        """
+
+        upFromU = [u]
+        seen = {u: 0}
+        while parent[upFromU[-1]] != -1:
+            upFromU.append(parent[upFromU[-1]])
+            seen[upFromU[-1]] = len(upFromU) - 1
 
-                currVisited = dict()
-                queue1 = deque(key)
+        upFromV = [v]
+        while upFromV[-1] not in seen:
+            upFromV.append(parent[upFromV[-1]])
 
-                while len(queue1) > 0:
+        ancestor = seen[upFromV[-1]]
+        upFromV.pop()
+        upFromV.reverse()
+        return upFromU[:ancestor + 1] + upFromV
 
-                    curr = queue1.popleft()
 
-                    if curr not in nodesVisitedAlready:
-                        nodesVisitedAlready[curr] = 1
+class FrozenUndirectedGraph(UndirectedGraph):
+    """
+    Class to implement a read-only snapshot of an UndirectedGraph
+    - vertices are numbered densely in insertion order and the adjacency is a FrozenAdjacency of CSR arrays
+    - every method that would change the graph raises TypeError
+    - the version is the one of the graph it was frozen from
+    """
+
+    @classmethod
+    def from_graph(cls, graph):
+        """
+        This method builds the snapshot of graph: live vertices are renumbered like save() does and their neighbors are
+        written in insertion order and again sorted by name. Its component index is built on its first query.
+        """
 
-                    if curr in currVisited:
-                        return True
+        frozen = cls()
+        dense = dict()
+        for i in graph._ids.values():
+            dense[i] = len(dense)
+
+        names = list(graph._ids)
+        offsets = array('q', [0])
+        targets = array('q')
+        ordered = array('q')
+        for i in graph._ids.values():
+            neighbors = [dense[j] for j in graph._adj[i]]
+            targets.extend(neighbors)
+            ordered.extend(sorted(neighbors, key=names.__getitem__))
+            offsets.append(len(targets))
+
+        frozen._names = names
+        frozen._ids = {name: i for i, name in enumerate(names)}
+        frozen._adj = FrozenAdjacency(offsets, targets, ordered)
+
+        frozen.version = graph.version
+        return frozen
+
+    def freeze(self):
+        """
+        A snapshot is already frozen, so it is its own snapshot.
+        """
 
-                    elif curr not in currVisited:
-                        currVisited[curr] = 1
+        return self
 
-                        for child in self.adj_list[curr]:
-                            queue1.append(child)
-                            if curr in self.adj_list[child]:
-                                self.adj_list[child].remove(curr)
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('a frozen graph cannot be changed, use the graph it was frozen from')
 
-        return False
+    add_vertex = add_edge = add_vertices = add_edges_from = remove_edge = remove_vertex = batch = _read_only
 
 
 if __name__ == '__main__':